@@ -52,6 +52,14 @@ class resource:
         self.name = name
         self.version = version
 
+    def set_key(self):
+        """
+        Return the hashable key that identifies this resource in a
+        resource_set. Plain resources define no __eq__(), so they are
+        only equal to themselves.
+        """
+        return self
+
     def __equal__(self, other):
         """
         Two resources are condidered equal when their type and names
@@ -75,20 +83,22 @@ class resource_set(ordered_set):
             raise TypeError("A resource_set may only contain "
                             "resource instances, not " + repr(type(resource)))
         
-        for index, a in enumerate(self):
-            if a.type == "procset" and \
-                   a.procset_name == value.procset_name and \
-                   a.version <= value.version:
-                self[index] = value
-                return
-            else:
-                if value == a: return
-
+        # Procsets replace those with the same name and a lower version.
+        if value.type == "procset":
+            for index, a in enumerate(self):
+                if a.type == "procset" and \
+                       a.procset_name == value.procset_name and \
+                       a.version <= value.version:
+                    self[index] = value
+                    return
 
         ordered_set.append(self, value)
 
     add = append
 
+    def key(self, value):
+        return value.set_key()
+
     def insert(self, *args):
         raise NotImplementedError()
 
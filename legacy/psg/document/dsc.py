@@ -485,6 +485,10 @@ class dsc_resource(resource):
         else:
             return False
 
+    def set_key(self):
+        # Matches __eq__() above.
+        return ( self.type, self.name, )
+
 class dsc_resource_set(resource_set):
     """
     A set of resource identifyers. The add() function will take care
@@ -39,6 +39,140 @@ import backgrounds, lists
 from t4.psg.drawing.engine_two.hyphenator import hyphenator
 
 
+def interned(properties):
+    """
+    Return a copy of the `properties` dict with all keys interned.
+    Property names like “font-size” are not interned by the compiler
+    (they are not identifiers), but they are the keys of every style
+    lookup, for which an identity match is the fastest.
+    """
+    return dict([ ( intern(key), value, )
+                  for key, value in properties.items() ])
+
+def merged(*dicts):
+    """
+    Return a new dict containing the items of all `dicts`. Later dicts
+    take precedence.
+    """
+    ret = {}
+    for d in dicts:
+        ret.update(d)
+    return ret
+
+class constraints(dict):
+    """
+    A read-only dict with interned keys used for the __constraints__ of
+    the base style classes below. The constraints are shared by all
+    instances of a class and its subclasses, so they must never be
+    modified. The classes that inherit from several of them have a
+    plain dict, see default_style.
+    """
+    def __init__(self, properties):
+        dict.__init__(self, interned(properties))
+
+    def __readonly(self, *args, **kw):
+        raise TypeError("Style constraints are read-only.")
+
+    __setitem__ = __delitem__ = __readonly
+    clear = pop = popitem = setdefault = update = __readonly
+
+class cached_style(cascading_style):
+    """
+    A cascading_style that remembers the values it resolved through
+    its chain of parents. Styles are usually set up once and then
+    queried for every character during layout. Each style counts the
+    writes to itself in its version; the cache is dropped when the
+    style or one of its parents has been modified.
+    """
+    # Bumped by every write to the style, see _modified().
+    _version = 0
+
+    def _modified(self):
+        self.__dict__["_version"] = self._version + 1
+
+    def _linked_styles(self):
+        """
+        Return the cascading_styles referenced from our __dict__. Among
+        them is the parent, wherever cascading_style keeps it and
+        however it was set (by the constructor, by __add__() or later).
+        """
+        return [ value for value in self.__dict__.values()
+                 if isinstance(value, cascading_style) ]
+
+    def _versions(self):
+        """
+        Return the list of this style and the styles it is linked to,
+        transitively, and a tuple of their ids and versions that changes
+        when one of them is modified or a link is replaced. Return None,
+        None if one of them is not a cached_style, whose changes could
+        not be noticed.
+        """
+        styles = [ self, ]
+        seen = { id(self), }
+        for style in styles:
+            if not isinstance(style, cached_style):
+                return None, None
+
+            for linked in style._linked_styles():
+                if id(linked) not in seen:
+                    seen.add(id(linked))
+                    styles.append(linked)
+
+        return styles, tuple([ ( id(style), style._version, )
+                               for style in styles ])
+
+    def _cache(self, attribute):
+        """
+        Return the cache dict stored in our __dict__ under `attribute`,
+        emptied if this style or one of its parents has been modified
+        since it was filled. (The __dict__ is used directly so the cache
+        does not end up as one of the style’s properties.)
+        """
+        styles, versions = self._versions()
+        if versions is None:
+            return {}
+
+        cache = self.__dict__.get(attribute, None)
+        if cache is None or cache[0] != versions:
+            # The styles are kept with the cache, so none of the ids in
+            # `versions` can be reused while it is in place.
+            cache = ( versions, {}, styles, )
+            self.__dict__[attribute] = cache
+
+        return cache[1]
+
+    def __getitem__(self, name):
+        values = self._cache("_resolved")
+        if name in values:
+            return values[name]
+        else:
+            ret = cascading_style.__getitem__(self, name)
+            values[name] = ret
+            return ret
+
+    def __setitem__(self, name, value):
+        self._modified()
+        cascading_style.__setitem__(self, name, value)
+
+    def __delitem__(self, name):
+        self._modified()
+        cascading_style.__delitem__(self, name)
+
+    def set_defaults(self, defaults):
+        """
+        Set each of the properties in the `defaults` dict.
+        """
+        for name, value in defaults.items():
+            self[name] = value
+
+    def __setattr__(self, name, value):
+        self._modified()
+        cascading_style.__setattr__(self, name, value)
+
+    def update(self, *args, **kw):
+        self._modified()
+        cascading_style.update(self, *args, **kw)
+
 class isfont(isinstance_constraint):
     """
     Make sure a style’s property is an instance of font.
@@ -47,42 +181,43 @@ class isfont(isinstance_constraint):
         isinstance_constraint.__init__(self, font)
 
 
-class font_family(cascading_style):
+class font_family(cached_style):
     """
     This defines a font family in a simple but usable way. A font
     family in our terms is a set of four font faces: regular, bold,
     italic and bold-italic. All faces default to the regular face
     which may not be None.    
     """
-    __constraints__ = {
+    __constraints__ = constraints({
         "__default__": unknown_property(),
         "regular": isfont(),
         "italic": accept_none(isfont()),
         "bold": accept_none(isfont()),
         "bold-italic": accept_none(isfont()),
-    }
+    })
 
     styles = { "normal", "italic" }
     weights = { "normal", "bold" }
 
+    # Map CSS’s ( style, weight, ) pairs to the face properties.
+    faces = { ( "normal", "normal", ): "regular",
+              ( "italic", "normal", ): "italic",
+              ( "normal", "bold", ): "bold",
+              ( "italic", "bold", ): "bold-italic", }
+
     def __init__(self, styles={}, parent=None):
         self.bold = None
         self.italic = None
         self.bold_italic = None
         
         cascading_style.__init__(self, styles, parent)
-
-        self.__by_spec = { "normal": { "normal": self.regular,
-                                       "bold": self.bold, },
-                           "italic": { "normal": self.italic,
-                                       "bold": self.bold_italic, } }
     
     def __getitem__(self, name):
         """
         All four styles default to regular, which may not be None
         as specified in the constraints.
         """
-        result = cascading_style.__getitem__(self, name)
+        result = cached_style.__getitem__(self, name)
         if result is None:
             return self.regular
         else:
@@ -93,13 +228,17 @@ class font_family(cascading_style):
         This is an additional accessor function that allows callers
         to query a font face by CSS’s style and weight keywords "normal",
         "italic" and "normal", "bold".
+
+        @raises KeyError: for unknown styles or weights.
         """
-        assert style in self.styles, ValueError(
-            "Unknown font style: " + repr(style))
-        assert weight in self.weights, ValueError(
-            "Unknown font weight: " + repr(style))
-        
-        return self.__by_spec[style][weight]
+        fonts = self._cache("_fonts")
+        key = ( style, weight, )
+        if key in fonts:
+            return fonts[key]
+        else:
+            ret = self[self.faces[key]]
+            fonts[key] = ret
+            return ret
 
     def __repr__(self):
         info = {}
@@ -115,8 +254,8 @@ class font_family(cascading_style):
         return repr(info)
     
     
-class text_style(cascading_style):
-    __constraints__ = {
+class text_style(cached_style):
+    __constraints__ = constraints({
         "__default__": unknown_property(),
         "font-family": isinstance_constraint(font_family),
         "font-size": conversion(float),
@@ -127,48 +266,51 @@ class text_style(cascading_style):
         "char-spacing": conversion(float),
         "color": isinstance_constraint(colors.color),
         "text-transform": accept_none(one_of({"lowercase", "uppercase"})),
-        "hyphenator": accept_none(isinstance_constraint(hyphenator)), }
+        "hyphenator": accept_none(isinstance_constraint(hyphenator)), })
 
-    def __init__(self, styles={}, parent=None, name=None):
-        # Set default values.
-        self.font_weight = "normal"
-        self.text_style = "normal"
-        self.kerning = True
-        self.char_spacing = 0
-        self.color = colors.black
-        self.text_transform = None
-        self.hyphenator = None
+    defaults = interned({
+        "font-weight": "normal",
+        "text-style": "normal",
+        "kerning": True,
+        "char-spacing": 0,
+        "color": colors.black,
+        "text-transform": None,
+        "hyphenator": None, })
 
+    def __init__(self, styles={}, parent=None, name=None):
+        self.set_defaults(self.defaults)
         cascading_style.__init__(self, styles, parent, name)
         
 
-class box_style(cascading_style):    
-    __constraints__ = {
+class box_style(cached_style):    
+    __constraints__ = constraints({
         "__default__": unknown_property(),
         "margin": tuple_of(4, float),
         "padding": tuple_of(4, float),
-        "background": isinstance_constraint(backgrounds.background), }
+        "background": isinstance_constraint(backgrounds.background), })
+
+    defaults = interned({
+        "margin": (0, 0, 0, 0),
+        "padding": (0, 0, 0, 0),
+        "background": backgrounds.none, })
 
     def __init__(self, styles={}, parent=None, name=None):
-        # Set default values.
-        self.margin = (0, 0, 0, 0)
-        self.padding = (0, 0, 0, 0)
-        self.background = backgrounds.none()
-        
+        self.set_defaults(self.defaults)
         cascading_style.__init__(self, styles, parent, name)
 
     
-class paragraph_style(cascading_style):
-    __constraints__ = {
+class paragraph_style(cached_style):
+    __constraints__ = constraints({
         "__default__": unknown_property(),
         "list-style": isinstance_constraint(lists.list_style),
-        "text-align": one_of({"left", "right", "center", "justified"}) }
+        "text-align": one_of({"left", "right", "center", "justified"}) })
+
+    defaults = interned({
+        "list-style": lists.none,
+        "text-align": "left", })
 
     def __init__(self, styles={}, parent=None, name=None):
-        # Set default values.
-        self.list_style = lists.none()
-        self.text_align = "left"
-        
+        self.set_defaults(self.defaults)
         cascading_style.__init__(self, styles, parent, name)
         
 class default_style(text_style, box_style, paragraph_style):
@@ -176,12 +318,20 @@ class default_style(text_style, box_style, paragraph_style):
     This style contains all the constraint definitions needed to
     render any psg.elements.* object in PostScript.
     """
-    __constraints__ = {}
+    # The constraints and defaults of the three base classes are merged
+    # here once, so an instance is initialized in a single pass. This is
+    # a plain dict of the class’ own (and so is style’s): cascading_style
+    # combines the constraints along the class hierarchy and may write
+    # the result into it.
+    __constraints__ = merged(text_style.__constraints__,
+                             box_style.__constraints__,
+                             paragraph_style.__constraints__)
+    defaults = merged(text_style.defaults,
+                      box_style.defaults,
+                      paragraph_style.defaults)
 
     def __init__(self, styles={}, parent=None, name=None):
-        text_style.__init__(self, {}, None, None)
-        box_style.__init__(self, {}, None, None)
-        paragraph_style.__init__(self, {}, None, None)
+        self.set_defaults(self.defaults)
         cascading_style.__init__(self, styles, parent, name)
 
 class style(text_style, box_style, paragraph_style):
@@ -189,7 +339,7 @@ class style(text_style, box_style, paragraph_style):
     This style contains all the constraint definitions needed to
     render any psg.elements.* object in PostScript.
     """
-    __constraints__ = {}
+    __constraints__ = merged(default_style.__constraints__)
 
     def __init__(self, styles={}, parent=None, name=None):
         cascading_style.__init__(self, styles, parent, name)
@@ -34,22 +34,31 @@ class background(object):
     """
     Abstract base class.
     """
+    __slots__ = ()
+
     def __repr__(self):
         return "<%s background>" % self.__class__.__name__
 
-class none(background):
+class no_background(background):
+    __slots__ = ()
+
     def __nonzero__(self):
         return False
 
     def __repr__(self):
         return "<no background>"
 
-transparent = none        
+# The absence of a background carries no state, so a single instance
+# is shared by all styles.
+none = no_background()
+transparent = none
 
 class color(background):
     """
     Fill the background with the specified color.
     """
+    __slots__ = ( "_color", )
+
     def __init__(self, color):
         self._color = color
 
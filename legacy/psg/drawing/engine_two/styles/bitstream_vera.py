@@ -33,44 +33,45 @@ module for testing purposes.
 The two module variables cmu_sans_serif and cmu_serif provide complete sets
 of engine two styles that can be used to render text.
 """
-from t4.psg.drawing.engine_two.styles import font_family, text_style, style
+from t4.psg.drawing.engine_two.styles import font_family, text_style, \
+     style, interned
 from t4.psg.fonts.bitstream_vera import sans_roman, sans_oblique, \
     sans_bold, sans_boldoblique, serif_roman, serif_bold
 
 from t4.psg.util import colors
 from t4.psg.drawing.engine_two.styles import backgrounds, lists     
 
-sans_serif_ff = font_family({ "regular": sans_roman,
-                              "italic": sans_oblique,
-                              "bold": sans_bold,
-                              "bold-italic": sans_boldoblique })
+sans_serif_ff = font_family(interned({ "regular": sans_roman,
+                                       "italic": sans_oblique,
+                                       "bold": sans_bold,
+                                       "bold-italic": sans_boldoblique }))
 
-serif_ff = font_family({ "regular": serif_roman,
-                         "italic": serif_roman,
-                         "bold": serif_bold,
-                         "bold-italic": serif_bold })
+serif_ff = font_family(interned({ "regular": serif_roman,
+                                  "italic": serif_roman,
+                                  "bold": serif_bold,
+                                  "bold-italic": serif_bold }))
 
-verasans_text = text_style({ "font-family": sans_serif_ff,
-                              "font-size": 10,
-                              "font-weight": "normal",
-                              "text-style": "normal",
-                              "line-height": 14,
-                              "kerning": True,
-                              "char-spacing": 0,
-                              "color": colors.black,
-                              "hyphenator": None, },
+verasans_text = text_style(interned({ "font-family": sans_serif_ff,
+                                       "font-size": 10,
+                                       "font-weight": "normal",
+                                       "text-style": "normal",
+                                       "line-height": 14,
+                                       "kerning": True,
+                                       "char-spacing": 0,
+                                       "color": colors.black,
+                                       "hyphenator": None, }),
                             name="verasans text")
 
-veraserif_text = verasans_text + {"font-family": serif_ff}
+veraserif_text = verasans_text + interned({"font-family": serif_ff})
 veraserif_text.set_name("veraserif text")
 
-box = style({ "margin": (0, 0, 0, 0),
-              "padding": (0, 0, 0, 0),
-              "background": backgrounds.none() },
+box = style(interned({ "margin": (0, 0, 0, 0),
+                       "padding": (0, 0, 0, 0),
+                       "background": backgrounds.none }),
             name="null box")
 
-paragraph = style({"list-style": lists.none(),
-                   "text-align": "left",},
+paragraph = style(interned({"list-style": lists.none,
+                            "text-align": "left",}),
                   name="left")
 
 
@@ -31,53 +31,77 @@ shipped with t4.psg and provided by the t4.psg.fonts.computer_modern
 module for testing purposes.
 
 The two module variables cmu_sans_serif and cmu_serif provide complete sets
-of engine two styles that can be used to render text.
+of engine two styles that can be used to render text. Like the other
+styles defined here they are only constructed when first accessed.
 """
-from t4.psg.drawing.engine_two.styles import font_family, style
+import sys
+
+from t4.psg.drawing.engine_two.styles import font_family, style, interned
 from t4.psg.fonts.computer_modern import sansserif, sansserif_bold, \
      sansserif_oblique, sansserif_boldoblique, \
      serif_roman, serif_italic, serif_bold, serif_bolditalic
 
 from t4.psg.util import colors
+from t4.psg.util.misc import lazy_module
 from t4.psg.drawing.engine_two.styles import backgrounds, lists     
 
-sans_serif_ff = font_family({ "regular": sansserif,
-                              "italic": sansserif_oblique,
-                              "bold": sansserif_bold,
-                              "bold-italic": sansserif_boldoblique })
+__all__ = [ "sans_serif_ff", "serif_ff", "sans_serif_text", "serif_text",
+            "box", "paragraph", "cmu_sans_serif", "cmu_serif", ]
 
-serif_ff = font_family({ "regular": serif_roman,
-                         "italic": serif_italic,
-                         "bold": serif_bold,
-                         "bold-italic": serif_bolditalic })
+def _sans_serif_ff(module):
+    return font_family(interned({ "regular": sansserif,
+                                  "italic": sansserif_oblique,
+                                  "bold": sansserif_bold,
+                                  "bold-italic": sansserif_boldoblique }))
 
-sans_serif_text = style({ "font-family": sans_serif_ff,
-                          "font-size": 10,
-                          "font-weight": "normal",
-                          "text-style": "normal",
-                          "line-height": 12.5,
-                          "kerning": True,
-                          "char-spacing": 0,
-                          "color": colors.black,
-                          "hyphenator": None, },
-                        name="cmuss")
+def _serif_ff(module):
+    return font_family(interned({ "regular": serif_roman,
+                                  "italic": serif_italic,
+                                  "bold": serif_bold,
+                                  "bold-italic": serif_bolditalic }))
 
-serif_text = sans_serif_text + {"font-family": serif_ff}
+def _sans_serif_text(module):
+    return style(interned({ "font-family": module.sans_serif_ff,
+                            "font-size": 10,
+                            "font-weight": "normal",
+                            "text-style": "normal",
+                            "line-height": 12.5,
+                            "kerning": True,
+                            "char-spacing": 0,
+                            "color": colors.black,
+                            "hyphenator": None, }),
+                 name="cmuss")
 
-box = style({ "margin": (0, 0, 0, 0),
-              "padding": (0, 0, 0, 0),
-              "background": backgrounds.none() },
-            name="null box")
+def _serif_text(module):
+    return module.sans_serif_text + interned({"font-family": module.serif_ff})
 
-paragraph = style({"list-style": lists.none(),
-                   "text-align": "left",},
-                  name="left")
+def _box(module):
+    return style(interned({ "margin": (0, 0, 0, 0),
+                            "padding": (0, 0, 0, 0),
+                            "background": backgrounds.none }),
+                 name="null box")
 
+def _paragraph(module):
+    return style(interned({"list-style": lists.none,
+                           "text-align": "left",}),
+                 name="left")
 
-cmu_sans_serif = sans_serif_text + box + paragraph
-cmu_sans_serif.set_name("cmuss")
+def _cmu_sans_serif(module):
+    ret = module.sans_serif_text + module.box + module.paragraph
+    ret.set_name("cmuss")
+    return ret
 
-cmu_serif = serif_text + box + paragraph
-cmu_serif.set_name("cmus")
+def _cmu_serif(module):
+    ret = module.serif_text + module.box + module.paragraph
+    ret.set_name("cmus")
+    return ret
 
-        
+sys.modules[__name__] = lazy_module(sys.modules[__name__],
+                                    { "sans_serif_ff": _sans_serif_ff,
+                                      "serif_ff": _serif_ff,
+                                      "sans_serif_text": _sans_serif_text,
+                                      "serif_text": _serif_text,
+                                      "box": _box,
+                                      "paragraph": _paragraph,
+                                      "cmu_sans_serif": _cmu_sans_serif,
+                                      "cmu_serif": _cmu_serif, })
@@ -33,27 +33,33 @@ class list_style(object):
     """
     An abstract base class for list styles.
     """
+    __slots__ = ()
+
     def __repr__(self):
         return "<%s list style>" % self.__class__.__name__
 
-class none(list_style):
+class no_list_style(list_style):
     """
     This element is not a list.
     """
+    __slots__ = ()
+
     def __nonzero__(self):
         return False
     
     def __repr__(self):        
         return "<no list style>"
 
+none = no_list_style()
+
 class disk(list_style):
     """
     Uses a • bullet point in lists.
     """
-    pass
+    __slots__ = ()
 
 class square(list_style):
     """
     Uses a square to indicate items visually.
     """
-    pass
+    __slots__ = ()
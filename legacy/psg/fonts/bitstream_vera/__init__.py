@@ -36,19 +36,24 @@ from t4.psg.fonts.type1 import type1
 from t4.psg.fonts.type1 import lazy_loader as lazy_loader_base
 
 class lazy_loader(lazy_loader_base):
-    def here(self):
-        return op.abspath(op.dirname(__file__))
-
-sans_roman = lazy_loader("BitstreamVeraSans-Roman") # Sans-Roman
-sans_oblique = lazy_loader("BitstreamVeraSans-Oblique") # Sans-Oblique
-sans_bold = lazy_loader("BitstreamVeraSans-Bold") # Sans-Bold
-sans_boldoblique = lazy_loader("BitstreamVeraSans-BoldOblique") # Sans-BoldOblique
-
-serif_roman = lazy_loader("BitstreamVeraSerif-Roman") # Serif-Roman
-serif_bold = lazy_loader("BitstreamVeraSerif-Bold") # Serif-Bold
-
-sansmono_roman = lazy_loader("BitstreamVeraSansMono-Roman") # SansMono-Roman
-sansmono_oblique = lazy_loader("BitstreamVeraSansMono-Oblique") # SansMono-Oblique
-sansmono_bold = lazy_loader("BitstreamVeraSansMono-Bold") # SansMono-Bold
-sansmono_boldoblique = lazy_loader("BitstreamVeraSansMono-BoldOb") # SansMono-BoldOb
-
+    directory = op.abspath(op.dirname(__file__))
+
+# ( name, file name, font name, ) for every font in this directory,
+# as printed by write.py.
+_fonts = [
+    ( "sans_roman", "BitstreamVeraSans-Roman", "Sans-Roman", ),
+    ( "sans_oblique", "BitstreamVeraSans-Oblique", "Sans-Oblique", ),
+    ( "sans_bold", "BitstreamVeraSans-Bold", "Sans-Bold", ),
+    ( "sans_boldoblique", "BitstreamVeraSans-BoldOblique", "Sans-BoldOblique", ),
+    ( "serif_roman", "BitstreamVeraSerif-Roman", "Serif-Roman", ),
+    ( "serif_bold", "BitstreamVeraSerif-Bold", "Serif-Bold", ),
+    ( "sansmono_roman", "BitstreamVeraSansMono-Roman", "SansMono-Roman", ),
+    ( "sansmono_oblique", "BitstreamVeraSansMono-Oblique", "SansMono-Oblique", ),
+    ( "sansmono_bold", "BitstreamVeraSansMono-Bold", "SansMono-Bold", ),
+    ( "sansmono_boldoblique", "BitstreamVeraSansMono-BoldOb", "SansMono-BoldOb", ),
+]
+
+for name, filename, font_name in _fonts:
+    globals()[name] = lazy_loader(filename)
+
+del name, filename, font_name
@@ -1,23 +1,24 @@
 # Cool. This program writes itself!
 
 import sys, re
-from string import *
 
-fullname_re = re.compile(r"/FontName /(.*) def", re.MULTILINE)
+fullname_re = re.compile(r"/FontName /(\S*) def")
 
 def fullname(pfb_filename):
-    fp = open(pfb_filename)
-    while True:
-        for line in map(strip, fp.xreadlines()):
-            match = fullname_re.match(line)
-            if match is not None:
-                return match.groups()[0]
-
-    raise ValueError("No FullName entry in " + repr(pfb_filename))
+    # The .pfb file's header is plain text; latin-1 maps its binary
+    # sections to characters without failing.
+    data = open(pfb_filename, "rb").read().decode("latin-1")
+    match = fullname_re.search(data)
+    if match is None:
+        raise ValueError("No FontName entry in " + repr(pfb_filename))
+    else:
+        return match.group(1)
 
+print "_fonts = ["
 for pfb_filename in sys.argv[1:]:
     long = fullname(pfb_filename).replace("BitstreamVera", "")
     identifyer = long.replace("-", "_").lower()
-    print '%s = lazy_loader("%s") # %s' % (
+    print '    ( "%s", "%s", "%s", ),' % (
         identifyer, pfb_filename.replace(".pfb", ""), long, )
+print "]"
     
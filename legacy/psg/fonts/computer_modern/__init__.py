@@ -35,39 +35,48 @@ from t4.psg.fonts.font import font
 from t4.psg.fonts.type1 import lazy_loader as lazy_loader_base
 
 class lazy_loader(lazy_loader_base):
-    def here(self):
-        return op.abspath(op.dirname(__file__))
+    directory = op.abspath(op.dirname(__file__))
 
-bright_bold = cmunbbx = lazy_loader("cmunbbx") # CMUBright-Bold
-bright_boldoblique = cmunbxo = lazy_loader("cmunbxo") # CMUBright-BoldOblique
-bright_oblique = cmunbmo = lazy_loader("cmunbmo") # CMUBright-Oblique
-bright_roman = cmunbmr = lazy_loader("cmunbmr") # CMUBright-Roman
-bright_semibold = cmunbsr = lazy_loader("cmunbsr") # CMUBright-Semibold
-bright_semiboldoblique = cmunbso = lazy_loader("cmunbso") # CMUBright-SemiboldOblique
-classicalserif_italic = cmunci = lazy_loader("cmunci") # CMUClassicalSerif-Italic
-concrete_bold = cmunobx = lazy_loader("cmunobx") # CMUConcrete-Bold
-concrete_bolditalic = cmunobi = lazy_loader("cmunobi") # CMUConcrete-BoldItalic
-concrete_italic = cmunoti = lazy_loader("cmunoti") # CMUConcrete-Italic
-concrete_roman = cmunorm = lazy_loader("cmunorm") # CMUConcrete-Roman
-sansserif = cmunss = lazy_loader("cmunss") # CMUSansSerif
-sansserif_bold = cmunsx = lazy_loader("cmunsx") # CMUSansSerif-Bold
-sansserif_boldoblique = cmunso = lazy_loader("cmunso") # CMUSansSerif-BoldOblique
-sansserif_demicondensed = cmunssdc = lazy_loader("cmunssdc") # CMUSansSerif-DemiCondensed
-sansserif_oblique = cmunsi = lazy_loader("cmunsi") # CMUSansSerif-Oblique
-serif_bold = cmunbx = lazy_loader("cmunbx") # CMUSerif-Bold
-serif_bolditalic = cmunbi = lazy_loader("cmunbi") # CMUSerif-BoldItalic
-serif_boldnonextended = cmunrb = lazy_loader("cmunrb") # CMUSerif-BoldNonextended
-serif_boldslanted = cmunbl = lazy_loader("cmunbl") # CMUSerif-BoldSlanted
-serif_italic = cmunti = lazy_loader("cmunti") # CMUSerif-Italic
-serif_roman = cmunrm = lazy_loader("cmunrm") # CMUSerif-Roman
-serif_romanslanted = cmunsl = lazy_loader("cmunsl") # CMUSerif-RomanSlanted
-serif_uprightitalic = cmunui = lazy_loader("cmunui") # CMUSerif-UprightItalic
-typewriter_bold = cmuntb = lazy_loader("cmuntb") # CMUTypewriter-Bold
-typewriter_bolditalic = cmuntx = lazy_loader("cmuntx") # CMUTypewriter-BoldItalic
-typewriter_italic = cmunit = lazy_loader("cmunit") # CMUTypewriter-Italic
-typewriter_light = cmunbtl = lazy_loader("cmunbtl") # CMUTypewriter-Light
-typewriter_lightoblique = cmunbto = lazy_loader("cmunbto") # CMUTypewriter-LightOblique
-typewriter_oblique = cmunst = lazy_loader("cmunst") # CMUTypewriter-Oblique
-typewriter_regular = cmuntt = lazy_loader("cmuntt") # CMUTypewriter-Regular
-typewritervariable = cmunvt = lazy_loader("cmunvt") # CMUTypewriterVariable
-typewritervariable_italic = cmunvi = lazy_loader("cmunvi") # CMUTypewriterVariable-Italic
+# ( name, file name, PostScript name, ) for every font in this directory,
+# as printed by write.py. Each font is available by its name and by its
+# file name.
+_fonts = [
+    ( "bright_bold", "cmunbbx", "CMUBright-Bold", ),
+    ( "bright_boldoblique", "cmunbxo", "CMUBright-BoldOblique", ),
+    ( "bright_oblique", "cmunbmo", "CMUBright-Oblique", ),
+    ( "bright_roman", "cmunbmr", "CMUBright-Roman", ),
+    ( "bright_semibold", "cmunbsr", "CMUBright-Semibold", ),
+    ( "bright_semiboldoblique", "cmunbso", "CMUBright-SemiboldOblique", ),
+    ( "classicalserif_italic", "cmunci", "CMUClassicalSerif-Italic", ),
+    ( "concrete_bold", "cmunobx", "CMUConcrete-Bold", ),
+    ( "concrete_bolditalic", "cmunobi", "CMUConcrete-BoldItalic", ),
+    ( "concrete_italic", "cmunoti", "CMUConcrete-Italic", ),
+    ( "concrete_roman", "cmunorm", "CMUConcrete-Roman", ),
+    ( "sansserif", "cmunss", "CMUSansSerif", ),
+    ( "sansserif_bold", "cmunsx", "CMUSansSerif-Bold", ),
+    ( "sansserif_boldoblique", "cmunso", "CMUSansSerif-BoldOblique", ),
+    ( "sansserif_demicondensed", "cmunssdc", "CMUSansSerif-DemiCondensed", ),
+    ( "sansserif_oblique", "cmunsi", "CMUSansSerif-Oblique", ),
+    ( "serif_bold", "cmunbx", "CMUSerif-Bold", ),
+    ( "serif_bolditalic", "cmunbi", "CMUSerif-BoldItalic", ),
+    ( "serif_boldnonextended", "cmunrb", "CMUSerif-BoldNonextended", ),
+    ( "serif_boldslanted", "cmunbl", "CMUSerif-BoldSlanted", ),
+    ( "serif_italic", "cmunti", "CMUSerif-Italic", ),
+    ( "serif_roman", "cmunrm", "CMUSerif-Roman", ),
+    ( "serif_romanslanted", "cmunsl", "CMUSerif-RomanSlanted", ),
+    ( "serif_uprightitalic", "cmunui", "CMUSerif-UprightItalic", ),
+    ( "typewriter_bold", "cmuntb", "CMUTypewriter-Bold", ),
+    ( "typewriter_bolditalic", "cmuntx", "CMUTypewriter-BoldItalic", ),
+    ( "typewriter_italic", "cmunit", "CMUTypewriter-Italic", ),
+    ( "typewriter_light", "cmunbtl", "CMUTypewriter-Light", ),
+    ( "typewriter_lightoblique", "cmunbto", "CMUTypewriter-LightOblique", ),
+    ( "typewriter_oblique", "cmunst", "CMUTypewriter-Oblique", ),
+    ( "typewriter_regular", "cmuntt", "CMUTypewriter-Regular", ),
+    ( "typewritervariable", "cmunvt", "CMUTypewriterVariable", ),
+    ( "typewritervariable_italic", "cmunvi", "CMUTypewriterVariable-Italic", ),
+]
+
+for name, filename, ps_name in _fonts:
+    globals()[name] = globals()[filename] = lazy_loader(filename)
+
+del name, filename, ps_name
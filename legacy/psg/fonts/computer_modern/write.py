@@ -9,8 +9,10 @@ result = entry_re.findall(fontmap)
 
 result.sort(lambda a, b: cmp(a[0], b[0]))
 
+print "_fonts = ["
 for name, filename in result:
     long = name[3:].lower().replace("-", "_")
     short = filename
 
-    print '%s = %s = lazy_loader("%s") # %s' % ( long, short, short, name, )
+    print '    ( "%s", "%s", "%s", ),' % ( long, short, name, )
+print "]"
@@ -30,7 +30,8 @@ This module contains code to handle PostScript Type1 fonts.
 """
 
 import os.path as op
-from types import *
+
+from t4.psg.util.misc import mapped
 
 from font import font
 from afm_metrics import afm_metrics
@@ -48,11 +49,11 @@ class type1(font):
            None for resident fonts.
         @param afm_file: File pointer of the corresponding .afm file
         """
-        if type(main_font_file) == StringType:
-            main_font_file = open(main_font_file)
+        if isinstance(main_font_file, str):
+            main_font_file = mapped(main_font_file)
 
-        if type(afm_file) == StringType:
-            afm_file = open(afm_file)
+        if isinstance(afm_file, str):
+            afm_file = mapped(afm_file)
         
         self._main_font_file = main_font_file
         self._afm_file = afm_file
@@ -69,7 +70,7 @@ class type1(font):
                       metrics)
 
     def has_char(self, unicode_char_code):
-        return self.metrics.has_key(unicode_char_code)
+        return unicode_char_code in self.metrics
 
     def main_font_file(self):
         return self._main_font_file
@@ -82,6 +83,9 @@ class lazy_loader(type1):
     A wrapper class that can be used like a function. Using
     t4.psg.fonts.computer_modern.sans_serif().
     """
+    # Directory to search for the font files in. Set by subclasses.
+    directory = None
+
     def __init__(self, filename):
         self.__font_filename = filename
         self.__font = None
@@ -90,15 +94,24 @@ class lazy_loader(type1):
         """
         Return the directory path where to search for `filename`.
         """
-        raise NotImplemented()
-        
+        if self.directory is None:
+            raise NotImplementedError()
+        else:
+            return self.directory
+
     def __call__(self):
         if self.__font is None:
-            shapes = op.join(self.here(), self.__font_filename + ".pfb")
-            metric = op.join(self.here(), self.__font_filename + ".afm")
-        
+            here = self.here()
+            shapes = op.join(here, self.__font_filename + ".pfb")
+            metric = op.join(here, self.__font_filename + ".afm")
+
             self.__font = type1(shapes, metric)
-            
+
+            # Copy the loaded font's attributes into this object so
+            # subsequent lookups find them in our own __dict__ and
+            # __getattr__() below is never entered again.
+            self.__dict__.update(self.__font.__dict__)
+
         return self.__font
 
     def __getattr__(self, name):
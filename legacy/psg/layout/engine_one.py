@@ -42,14 +42,103 @@ and start over with the unfinished section. If a section *is*
 finished, the process starts over with the next section. This should
 allow pretty sophisticated stuff.
 """
-import sys, types, copy
-from string import *
+import sys, copy
+from bisect import bisect_right
+from collections import deque
 
 from t4.debug import debug
 from t4.psg.drawing import box
 from t4.psg.exceptions import EndOfBox
 from t4.psg.util import *
 
+# The layout code creates lots of these.
+box_canvas = box.canvas
+box_textbox = box.textbox
+
+# Widths of the words measured by style.word_width(), keyed by the font and
+# the style properties that determine them. Most words occur many times in
+# a document. The cache is emptied once it holds more than
+# word_widths_max entries.
+_word_widths = {}
+word_widths_max = 65536
+
+def measure(font, font_size, char_spacing, kerning, word):
+    """
+    Return font.metrics.stringwidth() for `word`, cached.
+    """
+    key = ( font, font_size, char_spacing, kerning, word, )
+    try:
+        return _word_widths[key]
+    except KeyError:
+        if len(_word_widths) >= word_widths_max:
+            _word_widths.clear()
+
+        ret = font.metrics.stringwidth(word, font_size, kerning, char_spacing)
+        _word_widths[key] = ret
+        return ret
+
+def prefix_sums(widths, space_width):
+    """
+    Return a list whose n-th element is the sum of the first n `widths`,
+    each with `space_width` added to it.
+    """
+    ret = [ 0.0 ]
+    total = 0.0
+    for width in widths:
+        total += space_width + width
+        ret.append(total)
+
+    return ret
+
+def line_starts(sums, space_width, width, stop_after=None, first=0):
+    """
+    Break a sequence of words into lines of `width` and return a list
+    of the indices of the first word on each line. `sums` is the
+    prefix_sums() list of the word widths, `first` the index of the
+    first word to be considered. Instead of adding up the
+    words one by one, the end of each line is found by bisecting the
+    sums. Like the original loop this counts a space in front of the
+    first word of the first line, and each line holds at least one word
+    except for the first, which may be empty if its word is too wide.
+    """
+    count = len(sums) - 1
+    starts = [ first ]
+    end = max(bisect_right(sums, width + sums[first], first) - 1, first)
+    
+    while end < count:
+        starts.append(end)
+        if stop_after is not None and len(starts) >= stop_after:
+            break
+        
+        start = end
+        end = bisect_right(sums, width + space_width + sums[start],
+                           start + 1) - 1
+        if end == start:
+            # The word is wider than the line: put it on a line of its own.
+            end = start + 1
+        
+    return starts
+
+def derived(method):
+    """
+    Decorator for style methods that compute a value from the style’s
+    properties. The result is remembered until a property is set.
+    """
+    name = method.__name__
+    
+    def wrapper(self):
+        cache = self._derived
+        if name in cache:
+            return cache[name]
+        else:
+            ret = method(self)
+            cache[name] = ret
+            return ret
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
 class style(dict):
     """
     All lengths in PostScript units, all colors either in PostScript
@@ -87,18 +176,23 @@ class style(dict):
                  "margin-top": 0,          # In pt
                  "margin-right": 0,        # In pt
                  "margin-bottom": 0}       # In pt
+
+    # Map attribute names to the property names in defaults.
+    property_names = dict([ ( key.replace("-", "_"), key, )
+                            for key in defaults.keys() ])
                  
     def __init__(self, **attributes):
         dict.update(self, self.defaults)
         
         self._set = set()
+        self._derived = {}
         self.update(attributes)
         
         assert self.text_align in ( "left", "right", "justify", )
         assert self.vertical_align in ( "top", "center", "bottom", )
 
     def __repr__(self):
-        if self.has_key("name"):
+        if "name" in self:
             name = dict.__getitem__(self, "name")
         else:
             name = str(id(self))
@@ -106,74 +200,131 @@ class style(dict):
         return "<style object named: %s>" % name
         
     def __getattr__(self, name):
-        name = replace(name, "_", "-")
+        key = self.property_names.get(name, None)
+        if key is not None:
+            return dict.__getitem__(self, key)
+        
+        name = name.replace("_", "-")
 
-        if self.__dict__.has_key("_" + name):
+        if "_" + name in self.__dict__:
             method = object.__getattr__(self, "_" + name)
             return method()
-        elif self.has_key(name):
+        elif name in self:
             return self[name]
         else:
             raise AttributeError(name)
 
     def __setitem__(self, key, value):
-        key = replace(key, "_", "-")
+        key = key.replace("_", "-")
 
         if key in ("margin", "padding", "border", ):
             self._split_tuple(key, value)
         else:
             dict.__setitem__(self, key, value)
             self._set.add(key)
+            self._derived.clear()
 
     def _split_tuple(self, key, tpl):
         for idx, side in enumerate( ("top", "right", "bottom", "left",) ):
             self["%s-%s" % ( key, side, )] = float(tpl[idx])
 
     def __getitem__(self, key):
-        key = replace(key, "_", "-")
+        key = key.replace("_", "-")
         return dict.__getitem__(self, key)
 
     def update(self, other):
-        for key, value in other.iteritems():
-            self[key] = value
+        if isinstance(other, style):
+            # Its keys are normalized and tuple values have been split
+            # already, so there is no need to go through __setitem__().
+            dict.update(self, other)
+            self._set.update(other.keys())
+            self._derived.clear()
+        else:
+            for key, value in other.iteritems():
+                self[key] = value
+
+    @derived
+    def space_width(self):
+        """
+        The width of a space character. (Kerning doesn’t apply to a
+        single character.)
+        """
+        return self.word_width(u" ")
+
+    @derived
+    def full_line_height(self):
+        """
+        The vertical distance between two baselines.
+        """
+        return self.font_size * self.line_height
 
+    @derived
     def h_margin(self):
         return self.margin_left + self.margin_right
 
+    @derived
     def v_margin(self):
         return self.margin_top + self.margin_bottom
 
+    @derived
     def h_padding(self):
         return self.padding_left + self.padding_right
 
+    @derived
     def v_padding(self):
         return self.padding_top + self.padding_bottom
 
+    @derived
     def h_border(self):
         return self.border_left + self.border_right
 
+    @derived
     def v_border(self):
         return self.border_top + self.border_bottom
 
+    @derived
     def h_fringe(self):
         return self.h_padding() + self.h_border() + self.h_margin()
 
+    @derived
     def v_fringe(self):
         return self.v_padding() + self.v_border() + self.v_margin()
 
+    @derived
     def top_fringe(self):
         return self.margin_top + self.border_top + self.padding_top
     
+    @derived
     def right_fringe(self):
         return self.margin_right + self.border_right + self.padding_right
     
+    @derived
     def bottom_fringe(self):
         return self.margin_bottom + self.border_bottom + self.padding_bottom
 
+    @derived
     def left_fringe(self):
         return self.margin_left + self.border_left + self.padding_left
     
+    def copy(self):
+        """
+        Return a new style with the same properties. This bypasses
+        __init__() and __setitem__(), because all the values are known
+        to be valid.
+        """
+        ret = dict.__new__(style)
+        dict.update(ret, self)
+        ret._set = set(self._set)
+        ret._derived = {}
+        return ret
+        
     def __add__(self, other):
+        # Adding a style that sets nothing is merely a copy.
+        if not other._set:
+            return self.copy()
+        elif not self._set:
+            return other.copy()
+        
         ret = style()
         for a in self._set:
             ret[a] = self[a]
@@ -188,35 +339,46 @@ class style(dict):
         Return the width of WORD when rendered in this style (without
         padding and margin, just the text style).
         """
-        if type(word) == types.TupleType:
+        if isinstance(word, tuple):
             return word[1]
         else:
-            return self.font.metrics.stringwidth(
-                word, self.font_size, kerning, self.char_spacing)
-
-    def words_with_width(self, words, kerning=True):
+            return measure(self.font, self.font_size, self.char_spacing,
+                           kerning, word)
 
-        if type(words) == types.StringType:
-            words = map(unicode, splitfields(words))
-        elif type(words) == types.UnicodeType:
-            words = splitfields(words)
-
-        ret = []
+    def words_and_widths(self, words, kerning=True):
+        """
+        Return a pair of lists: the words and their widths. WORDS may
+        be a string or a list of strings and (word, word_width) pairs.
+        """
+        if isinstance(words, unicode):
+            words = words.split()
+        elif isinstance(words, str):
+            words = map(unicode, words.split())
+
+        ret_words = []
+        ret_widths = []
+        word_width = self.word_width
         for word in words:
-            if type(word) == types.TupleType:
-                ret.append(word)
+            if isinstance(word, tuple):
+                word, width = word
             else:
-                if type(word) != types.UnicodeType:
+                if not isinstance(word, unicode):
                     word = unicode(str(word))
-                ret.append( (word, self.word_width(word),) )
+                width = word_width(word)
+                
+            ret_words.append(word)
+            ret_widths.append(width)
 
-        return ret
+        return ( ret_words, ret_widths, )
+    
+    def words_with_width(self, words, kerning=True):
+        return zip(*self.words_and_widths(words, kerning))
 
     def words_width(self, words, kerning=True):
-        space_width = self.word_width(u" ")
-        return sum(map(lambda tpl: tpl[1],
-                       self.words_with_width(words, kerning))) + \
-                       (len(words)-1) * space_width
+        space_width = self.space_width()
+        pairs = self.words_with_width(words, kerning)
+        return sum(width for word, width in pairs) + \
+               (len(pairs)-1) * space_width
 
     def div_width(self, words, kerning=True):
         return self.words_width(words, kerning) + self.h_fringe()
@@ -232,24 +394,29 @@ class style(dict):
         if len(words) == 0:
             return 0
         
-        space_width = self.word_width(u" ", kerning)
-        
-        lines = 1
-        cursor = 0        
-        for word in words:
-            word_width = self.word_width(word, kerning)
-                
-            if cursor + space_width + word_width > width:
-                lines += 1
-
-                if stop_after is not None and lines >= stop_after:
-                    return lines
-                
-                cursor = word_width
-            else:
-                cursor += space_width + word_width
+        space_width = self.space_width()
+        word_width_of = self.word_width
+
+        if stop_after is not None:
+            # Only the first few lines matter, so measure the words one
+            # by one and stop as soon as the answer is known.
+            lines = 1
+            cursor = 0
+            for word in words:
+                word_width = word_width_of(word, kerning)
+                if cursor + space_width + word_width > width:
+                    lines += 1
+                    if lines >= stop_after:
+                        return lines
+                    cursor = word_width
+                else:
+                    cursor += space_width + word_width
 
-        return lines
+            return lines
+        
+        sums = prefix_sums([ word_width_of(word, kerning) for word in words ],
+                           space_width)
+        return len(line_starts(sums, space_width, width))
         
     def set_font(self, textbox, line_spacing=0, kerning=True):
         textbox.set_font(font = self.font,
@@ -284,8 +451,16 @@ def run_the_engine(column_factory, section_factory):
 
         section = column.add_section(section)
 
+def rectangle_path(ax, ay, bx, by):
+    """
+    Return PostScript code for a closed rectangular subpath with corners
+    at ( ax, ay, ) and ( bx, by, ) as a single string.
+    """
+    return "%f %f moveto %f %f lineto %f %f lineto %f %f lineto closepath" % (
+        ax, ay, bx, ay, bx, by, ax, by, )
+
 def null_canvas(canvas):
-    return box.canvas(canvas,
+    return box_canvas(canvas,
                       0, 0,
                       canvas.w(), canvas.h(),
                       False, False)
@@ -335,7 +510,7 @@ class rectangular_column(column):
         if self.remainder() == self.height():
             canvas = self._canvas
         else:
-            canvas = box.canvas(self._canvas,
+            canvas = box_canvas(self._canvas,
                                 0, 0, 
                                 self._canvas.w(), self.remainder(),
                                 border=False, clip=False)
@@ -380,84 +555,93 @@ class simple_paragraph(section):
         # Right on initialization calculate the words widths using the
         # current style.
         self.style = style
-        self.words = style.words_with_width(words)
-        
+        self.words, self.widths = style.words_and_widths(words)
+        self.space_width = style.space_width()
+        self._sums = prefix_sums(self.widths, self.space_width)
+
+        # A list of ( start, end, ) index pairs into words and widths,
+        # one for each line not typeset yet. Those start at index first.
         self.lines = None
+        self.first = 0
         self.lines_calculated_for = None
 
+        # Results of split_lines() and minimum_height() by canvas width
+        # for the words not typeset yet. Emptied whenever that changes.
+        self._lines_for = {}
+        self._minimum_height_for = {}
+
     def reset(self):
         self.lines = None
+        self.first = 0
         self.lines_calculated_for = None        
+        self._lines_for.clear()
+        self._minimum_height_for.clear()
         
     def minimum_height(self, test_canvas):
         """
         The minimum space is always one line of text.
         """
-        self.split_lines(test_canvas)
+        return self.minimum_height_for(test_canvas.w())
+
+    def minimum_height_for(self, width):
+        """
+        Like minimum_height() for a canvas of `width`. Only the width
+        matters to a paragraph, so there is no need for a test canvas.
+        """
+        if width in self._minimum_height_for:
+            return self._minimum_height_for[width]
+        
+        self.split_lines_for(width)
 
         if len(self.lines) >= 2:
             # If there are two or more lines, we want to print two lines
             # min, so we won't leave an orphan behind.
-            return 2 * self.style.font_size * self.style.line_height
+            ret = 2 * self.style.full_line_height()
         else:
             # Otherwise, we're satisfied with a single line of print.
-            return self.style.font_size * self.style.line_height
+            ret = self.style.full_line_height()
+
+        self._minimum_height_for[width] = ret
+        return ret
 
     def split_lines(self, canvas):
-        width = canvas.w()
-        
+        self.split_lines_for(canvas.w())
+
+    def split_lines_for(self, width):
         if self.lines_calculated_for != width:
             self.lines_calculated_for = width
-            if self.lines is None:
-                words = self.words
-            else:
-                # We can get the words still to be typeset from the
-                # lines attribute.
-                words = []
-                for line in self.lines:
-                    words += line
-                
-            # After this, this.lines contains a list of lists of pairs,
-            # suitable to be passed to textbox' typeset_line() method.
-            space_width = self.style.word_width(u" ")
-            column_width = width
+            if width in self._lines_for:
+                self.lines = self._lines_for[width]
+                return
             
-            self.lines = [[]]
-            line_width = 0
-            if len(words) > 0 and type(words[-1]) == types.BooleanType:
-                words = words[:-1]
-            for word, word_width in words:
-                tpl = (word, word_width,)
-                if line_width + space_width + word_width > column_width:
-                    self.lines.append([tpl,])
-                    line_width = word_width
-                else:
-                    self.lines[-1].append(tpl)
-                    line_width += space_width + word_width
-                    
-            self.lines[-1].append(True) # Last line marker
+            bounds = line_starts(self._sums, self.space_width, width,
+                                 first=self.first) + [ len(self.words) ]
+            lines = zip(bounds, bounds[1:])
+            self.lines = lines
+            self._lines_for[width] = lines
         
         
     def draw(self, canvas):
-        if canvas.h() < self.minimum_height(null_canvas(canvas)):
+        if canvas.h() < self.minimum_height_for(canvas.w()):
            raise ValueError("The canvas provided was smaller than the "
                              "minimum required vertical space.")
 
         self.split_lines(canvas)
-        tb = box.textbox(canvas, 0, 0, canvas.w(), canvas.h(),
+        tb = box_textbox(canvas, 0, 0, canvas.w(), canvas.h(),
                          border=False)        
         canvas.append(tb)
 
-        line_spacing = ( self.style.line_height * self.style.font_size ) - \
-                       self.style.font_size
+        style = self.style
+        font_size = style.font_size
+        line_height = style.full_line_height()
+        line_spacing = line_height - font_size
         
-        self.style.set_font(tb)
+        style.set_font(tb)
         
-        if self.style.color is not None:
-            print >> tb, self.style.color
+        if style.color is not None:
+            print >> tb, style.color
 
-        room_for = int(canvas.h() /
-                       (self.style.font_size * self.style.line_height))
+        room_for = int(canvas.h() / line_height)
         if room_for >= len(self.lines):
             lines = self.lines
             self.lines = []
@@ -468,14 +652,21 @@ class simple_paragraph(section):
             lines = self.lines[:room_for]
             self.lines = self.lines[room_for:]
 
-        for line in lines:
-            if len(line) > 0 and line[-1] == True:
-                line = line[:-1]
-                last_line = True
-            else:
-                last_line = False
-                
-            tb.typeset_line(line, last_line)
+        if self.lines:
+            self.first = self.lines[0][0]
+        else:
+            self.first = len(self.words)
+            
+        # The words left over from this canvas will be split anew.
+        self._lines_for.clear()
+        self._minimum_height_for.clear()
+
+        words = self.words
+        widths = self.widths
+        for start, end in lines:
+            last_line = ( end == len(words) )
+            tb.typeset_line(zip(words[start:end], widths[start:end]),
+                            last_line)
 
             if not last_line:
                 try:
@@ -490,42 +681,51 @@ class container(section):
     This is a section that contains several sections.
     """
     def __init__(self, sections):
-        self._sections = sections[:]
         self.sections = sections[:]
 
+        # Index of the first section not completely drawn, yet.
+        self.current = 0
+
     def reset(self):
-        self.sections = self._sections
-        for section in self.subsections:
+        self.current = 0
+        for section in self.sections:
             section.reset()
         
     def minimum_height(self, test_canvas):
-        return self.sections[0].minimum_height(test_canvas)
+        return self.sections[self.current].minimum_height(test_canvas)
 
     def draw(self, canvas):
-        if len(self.sections) == 0:
+        sections = self.sections
+        count = len(sections)
+        
+        if self.current >= count:
             raise ValueError("Container is empty.")
 
         space_used = 0
-        idx = 0
-        while self.sections:
-            inner = box.canvas(canvas,
+        test_canvas = None
+        while self.current < count:
+            inner = box_canvas(canvas,
                                0, 0,
                                canvas.w(), canvas.h() - space_used,
                                border=False, clip=False)
             canvas.append(inner)
 
-            used, done = car(self.sections).draw(inner)
+            used, done = sections[self.current].draw(inner)
             space_used += used
             
             if done:
-                self.sections = cdr(self.sections)
+                self.current += 1
 
                 # If the remaining space on this canvas is smaller
                 # than the next sections's minimum height,
                 # we're done here.
-                if len(self.sections) > 0 and canvas.h() - space_used < \
-                        car(self.sections).minimum_height(null_canvas(canvas)):
-                    return space_used, False
+                if self.current < count:
+                    if test_canvas is None:
+                        test_canvas = null_canvas(canvas)
+                        
+                    if canvas.h() - space_used < \
+                           sections[self.current].minimum_height(test_canvas):
+                        return space_used, False
             else:
                 return space_used, False
 
@@ -567,27 +767,28 @@ class margin(style_section):
             return self.subsection.minimum_height(test_canvas)
 
     def draw(self, canvas):
+        style = self.style
         if self.start:
-            margin_top = self.style.margin_top
+            margin_top = style.margin_top
         else:
             margin_top = 0
             
-        inner = box.canvas(canvas,
-                           self.style.margin_left,
+        inner = box_canvas(canvas,
+                           style.margin_left,
                            0,
-                           canvas.w()- self.style.h_margin(),
+                           canvas.w()- style.h_margin(),
                            canvas.h()- margin_top,
                            border=False, clip=False)
         
         used_space, done = self.subsection.draw(inner)
         
         if self.start:
-            used_space += self.style.margin_top
+            used_space += style.margin_top
             
         
         self.start = False
         if done:
-            used_space += self.style.margin_bottom
+            used_space += style.margin_bottom
             if used_space > canvas.h():
                 used_space = canvas.h()
                 
@@ -605,18 +806,19 @@ class border(style_section):
             return self.subsection.minimum_height(test_canvas)
 
     def draw(self, canvas):
+        style = self.style
         used_space = 0
         
         if self.start:
-            height = canvas.h() - self.style.border_top
-            used_space = self.style.border_top
+            height = canvas.h() - style.border_top
+            used_space = style.border_top
         else:
             height = canvas.h()
 
-        inner = box.canvas(canvas,
-                           self.style.border_left,
+        inner = box_canvas(canvas,
+                           style.border_left,
                            0,
-                           canvas.w() - self.style.h_border(),
+                           canvas.w() - style.h_border(),
                            height,
                            border=False, clip=False)
         
@@ -624,51 +826,55 @@ class border(style_section):
         used_space += used
 
         if done:
-            used_space += self.style.border_bottom
+            used_space += style.border_bottom
             if used_space > canvas.h():
                 used_space = canvas.h()
                 
-        if self.style.border_color:
-            if self.start and self.style.border_top:
-                self.rect( canvas,
-                           0, canvas.h(),
-                           canvas.w(), canvas.h()-self.style.border_top )
+        if style.border_color:
+            rects = []
+            if self.start and style.border_top:
+                rects.append( ( 0, canvas.h(),
+                                canvas.w(), canvas.h()-style.border_top, ) )
                
-            if self.style.border_left:
-                self.rect( canvas,
-                           0, canvas.h(),
-                           self.style.border_left, canvas.h()-used_space )
+            if style.border_left:
+                rects.append( ( 0, canvas.h(),
+                                style.border_left,
+                                canvas.h()-used_space, ) )
                
-            if self.style.border_right:
-                self.rect( canvas,
-                           canvas.w(), canvas.h(),
-                           canvas.w() - self.style.border_right,
-                           canvas.h()- used_space )
+            if style.border_right:
+                rects.append( ( canvas.w(), canvas.h(),
+                                canvas.w() - style.border_right,
+                                canvas.h()- used_space, ) )
                
-            if done and self.style.border_bottom:
-                self.rect( canvas,
-                           canvas.w() - self.style.border_right,
-                           canvas.h() - used_space,
-                           0,
-                           canvas.h() - used_space + self.style.border_bottom)
+            if done and style.border_bottom:
+                rects.append( ( canvas.w() - style.border_right,
+                                canvas.h() - used_space,
+                                0,
+                                canvas.h() - used_space + \
+                                    style.border_bottom, ) )
+
+            if rects:
+                self.rects(canvas, rects)
+                
         canvas.append(inner)
 
         self.start = False
         return ( used_space, done, )
 
-    def rect(self, canvas, ax, ay, bx, by):
-        canvas._( "gsave",
-                  "newpath",
-                  ax, ay, "moveto",
-                  bx, ay, "lineto",
-                  bx, by, "lineto",
-                  ax, by, "lineto",
-                  
-                  "closepath",
-                  self.style.border_color,
-                  "fill",
-                  
-                  "grestore" )
+    def rects(self, canvas, rects):
+        """
+        Fill the rectangles, given as ( ax, ay, bx, by, ) corner
+        coordinates, as one path. Each is drawn in the same direction,
+        so where two overlap, the nonzero winding rule doesn’t leave a
+        hole.
+        """
+        path = []
+        for ax, ay, bx, by in rects:
+            path.append(rectangle_path(min(ax, bx), min(ay, by),
+                                       max(ax, bx), max(ay, by)))
+            
+        print >> canvas, "gsave newpath %s %s fill grestore" % (
+            " ".join(path), self.style.border_color, )
         
 
     
@@ -681,17 +887,18 @@ class padding(style_section):
             return self.subsection.minimum_height(test_canvas)
 
     def draw(self, canvas):
+        style = self.style
         if self.start:
-            height = canvas.h() - self.style.padding_top
-            used_space = self.style.padding_top
+            height = canvas.h() - style.padding_top
+            used_space = style.padding_top
         else:
             height = canvas.h()
             used_space = 0
 
-        inner = box.canvas(canvas,
-                           self.style.padding_left,
+        inner = box_canvas(canvas,
+                           style.padding_left,
                            0,
-                           canvas.w() - self.style.h_padding(),
+                           canvas.w() - style.h_padding(),
                            height,
                            border=False, clip=False)
         
@@ -699,24 +906,15 @@ class padding(style_section):
         used_space += used
 
         if done:
-            used_space += self.style.padding_bottom
+            used_space += style.padding_bottom
             if used_space > canvas.h():
                 used_space = canvas.h()
                 
-        if self.style.background_color:
-            ax, ay = 0, canvas.h()
-            bx, by = canvas.w(), canvas.h() - used_space
-            
-            canvas._( "gsave",
-                      "newpath",
-                      ax, ay, "moveto",
-                      bx, ay, "lineto",
-                      bx, by, "lineto",
-                      ax, by, "lineto",
-                      "closepath",
-                      self.style.background_color,
-                      "fill",
-                      "grestore" )
+        if style.background_color:
+            print >> canvas, "gsave newpath %s %s fill grestore" % (
+                rectangle_path(0, canvas.h(),
+                               canvas.w(), canvas.h() - used_space),
+                style.background_color, )
             
         canvas.append(inner)
 
@@ -747,6 +945,11 @@ class headed_section(section):
         
         self.start = True
 
+        # The heads are drawn completely every time and then reset, so
+        # their height only depends on the canvas width. Maps pairs of
+        # ( head, width, ) to heights.
+        self._head_heights = {}
+
     def reset(self):
         self.start = True
         
@@ -768,9 +971,14 @@ class headed_section(section):
         head = self.head_object()
         
         if head is not None:
-            head.minimum_height(test_canvas)
-            head_space, done = head.draw(test_canvas)
-            head.reset()
+            key = ( head, test_canvas.w(), )
+            if key in self._head_heights:
+                head_space = self._head_heights[key]
+            else:
+                head.minimum_height(test_canvas)
+                head_space, done = head.draw(test_canvas)
+                head.reset()
+                self._head_heights[key] = head_space
         else:
             head_space = 0
 
@@ -780,7 +988,7 @@ class headed_section(section):
         head = self.head_object()
 
         if head is not None:
-            head_canvas = box.canvas(canvas,
+            head_canvas = box_canvas(canvas,
                                      canvas.x(), canvas.y(),
                                      canvas.w(), canvas.h())
             header_height, done = head.draw(head_canvas)
@@ -796,7 +1004,7 @@ class headed_section(section):
         
         self.start = False
 
-        subcanvas = box.canvas(canvas,
+        subcanvas = box_canvas(canvas,
                                0, 0,
                                canvas.w(), canvas.h() - header_height,
                                border=False, clip=False)
@@ -815,7 +1023,7 @@ class table(wrapper_section):
                                                        head, 
                                                        *rows)))
     def draw(self, canvas):
-        inner = box.canvas(canvas,
+        inner = box_canvas(canvas,
                            0, 0,
                            self.width() + self.style.h_fringe(), canvas.h(),
                            border=False, clip=False)
@@ -826,8 +1034,11 @@ class simple_table(section):
     def __init__(self, style, column_widths, head, *rows):
         self.style = style
         self.column_widths = column_widths
+
+        # null_canvas()es shared by the cells for measuring, by size.
+        self._test_canvases = {}
         
-        self.rows = []
+        self.rows = deque()
         for row in rows:
             self.append(row)
             
@@ -852,9 +1063,21 @@ class simple_table(section):
     def width(self):
         return sum(self.column_widths)
 
+    def test_canvas(self, canvas):
+        """
+        Return a null_canvas() the size of `canvas`. Any PostScript
+        created on it is discarded, so it is shared by all cells whose
+        canvases have the same size.
+        """
+        key = ( canvas.w(), canvas.h(), )
+        if key not in self._test_canvases:
+            self._test_canvases[key] = null_canvas(canvas)
+        return self._test_canvases[key]
+
     def predraw(self, canvas):
         if self.head: self.head.predraw(canvas)
-        map(lambda row: row.predraw(canvas), self.rows)
+        for row in self.rows:
+            row.predraw(canvas)
         
     def minimum_height(self, canvas):
         self.predraw(canvas)
@@ -871,7 +1094,7 @@ class simple_table(section):
 
         if self.head:
             top -= self.head.height()
-            head_canvas = box.canvas(canvas,
+            head_canvas = box_canvas(canvas,
                                      0, top,
                                      canvas.w(), top,
                                      border=False, clip=False)
@@ -887,13 +1110,12 @@ class simple_table(section):
 
             top -= self.rows[0].height()
             
-            row_canvas = box.canvas(canvas,
+            row_canvas = box_canvas(canvas,
                                     0, top,
                                     canvas.w(), top,
                                     border=False, clip=False)
             canvas.append(row_canvas)
-            self.rows[0].draw(row_canvas)
-            del self.rows[0]
+            self.rows.popleft().draw(row_canvas)
 
         return canvas.h() - top, True
         
@@ -902,6 +1124,7 @@ class row(section):
     def __init__(self, style, *cells):
         self.style = style
         self.table = None
+        self._height = None
 
         self.cells = []
         for cell in cells:
@@ -910,6 +1133,7 @@ class row(section):
     def append(self, cell):
         cell.set_row(self, len(self))
         self.cells.append(cell)
+        self._height = None
 
     def __len__(self):
         return len(self.cells)
@@ -926,49 +1150,50 @@ class row(section):
             cell.set_row(self, idx)
 
     def predraw(self, canvas):
-        map(lambda cell: cell.predraw(canvas), self.cells)
+        for cell in self.cells:
+            cell.predraw(canvas)
             
     def height(self):
-        return max(map(lambda cell: cell.height(), self))
+        # The cells' heights are fixed once they have been predrawn.
+        if self._height is None:
+            self._height = max(cell.height() for cell in self.cells)
+        return self._height
 
     def minimum_height(self, canvas):
         return self.height()
     
     def draw(self, canvas):
+        height = self.height()
+        
         if self.style.background_color:
-            ax, ay = 0, 0
-            bx, by = canvas.w(), self.height()
-            
-            canvas._( "gsave",
-                      "newpath",
-                      ax, ay, "moveto",
-                      bx, ay, "lineto",
-                      bx, by, "lineto",
-                      ax, by, "lineto",
-                      "closepath",
-                      self.style.background_color,
-                      "fill grestore")
+            print >> canvas, "gsave newpath %s %s fill grestore" % (
+                rectangle_path(0, 0, canvas.w(), height),
+                self.style.background_color, )
             
 
         left = 0
+        column_widths = self.table.column_widths
         for cell in self.cells:
-            cell_canvas = box.canvas(canvas,
+            width = column_widths[cell.column_index]
+            cell_canvas = box_canvas(canvas,
                                      left, 0,
-                                     cell.width(), self.height(),
+                                     width, height,
                                      border=False, clip=False)
             cell.draw(cell_canvas)
             canvas.append(cell_canvas)
-            left += cell.width()
+            left += width
 
-        return self.height(), True
+        return height, True
 
 class cell(section):
     def __init__(self, style, subsection):
         self.style = style
         self.section = subsection
         self.row = None
+        self.table = None
         self.column_index = -1
         self.canvas = None
+        self.space_used = None
         
     def set_row(self, row, column_index):
         self.row = row
@@ -977,27 +1202,24 @@ class cell(section):
 
     def predraw(self, canvas):
         if self.canvas is not None: return
-        
-        inner_canvas = box.canvas(canvas,
-                                  0, 0,
-                                  self.table.width()-self.style.h_fringe(),
-                                  10000,
-                                  border=False, clip=False)
-        
-        self.section.minimum_height(null_canvas(inner_canvas))
-        space_used, done = self.section.draw(inner_canvas)
 
-        self.canvas = box.canvas(canvas,
-                                 0, -(inner_canvas.h() - space_used),
-                                 self.table.width(), space_used,
+        # The section is drawn at the top of a canvas high enough for
+        # anything. Only the space_used at its top is occupied;
+        # inner_cell.draw() positions the canvas accordingly.
+        self.canvas = box_canvas(canvas,
+                                 0, 0,
+                                 self.table.width()-self.style.h_fringe(),
+                                 10000,
                                  border=False, clip=False)
-        self.canvas.append(inner_canvas)
+        
+        self.section.minimum_height(self.table.test_canvas(self.canvas))
+        self.space_used, done = self.section.draw(self.canvas)
 
     def width(self):
         return self.table.column_widths[self.column_index]
 
     def height(self):
-        return self.canvas.h() + self.style.v_fringe()
+        return self.space_used + self.style.v_fringe()
     
     def draw(self, canvas):
         section = fringes(self.style, inner_cell(self))
@@ -1017,21 +1239,18 @@ class inner_cell(section):
         if self.style.vertical_align == "top":
             padding_top = 0.0
         elif self.style.vertical_align == "middle":
-            padding_top = ( canvas.h() - self.height() ) / 2
+            padding_top = ( canvas.h() - self.cell.space_used ) / 2
         elif self.style.vertical_align == "bottom":
-            padding_top = ( canvas.h() - self.height() )
+            padding_top = ( canvas.h() - self.cell.space_used )
         else:
             ValueError(self.style.vertical_align)
 
-        new_canvas = box.canvas(canvas,
-                                0,
-                                canvas.h() - padding_top - self.cell.canvas.h(),
-                                self.cell.width(),
-                                self.cell.canvas.h(),
-                                border=False, clip=False)
-        canvas.append(new_canvas)
-        new_canvas.append(self.cell.canvas)
-        return self.cell.canvas.h(), True
+        print >> canvas, "gsave 0 %f translate" % (
+            canvas.h() - padding_top - self.cell.canvas.h(), )
+        canvas.append(self.cell.canvas)
+        print >> canvas, "grestore"
+        
+        return self.cell.space_used, True
 
 class raster_image(wrapper_section):
     def __init__(self, style, image, maxsize=None):
@@ -1043,9 +1262,21 @@ class simple_raster_image(section):
         self.image = image
         self.maxsize = maxsize
 
+        # Results of size() by canvas dimensions.
+        self._sizes = {}
+
     def size(self, canvas):
         cw, ch = ( canvas.w(), canvas.h(), )
+        
+        key = ( cw, ch, )
+        if key not in self._sizes:
+            self._sizes[key] = self.size_for(cw, ch)
+        return self._sizes[key]
 
+    def size_for(self, cw, ch):
+        """
+        Like size() for a canvas of `cw` by `ch`.
+        """
         if self.maxsize is not None:
             # If the maxsize doesn't fit on the canvas, we use the
             # canvas' dimensions.
@@ -1082,11 +1313,10 @@ class simple_raster_image(section):
         
         scale_factor = w / iw 
         
-        canvas._("gsave",
-                 0, canvas.h() - h, "translate",
-                 scale_factor, scale_factor, "scale")
+        print >> canvas, "gsave 0 %f translate %f %f scale" % (
+            canvas.h() - h, scale_factor, scale_factor, )
         canvas.append(image_box)
-        canvas._("grestore")
+        print >> canvas, "grestore"
         
         return h, True
         
@@ -29,12 +29,13 @@
 """
 Procsets are predefined PostScript programs that are put into a
 document's header if psg needs them. They are read from .ps files in
-the procset module's directory.
+the procset module's directory. The dsc_<name> resource for <name>.ps
+is only created when it is accessed for the first time.
 """
 import sys, re, os, os.path
-from string import *
 from glob import glob
 
+from t4.psg.util.misc import lazy_module, mapped
 from t4.psg.document.dsc import dsc_resource, \
     resource_section as dsc_section
 
@@ -43,23 +44,35 @@ files = glob("%s/*.ps" % directory)
 
 revision_re = re.compile(r"\$\s*Revision:\s*(\d+)\.(\d+)\s*\$")
 
-for file_name in files:
-    ps = open(file_name).read()    
-    parts = split(os.path.basename(file_name), ".") # split of the .ps
-    var_name = parts[0]
-    
-    result = revision_re.findall(ps)
-    version = result[0]
-    major, minor = version
-    major, minor = int(major), int(minor)
+def procset_loader(file_name):
+    """
+    Return a lazy_module factory that creates the dsc_resource for the
+    procset in `file_name`.
+    """
+    var_name = os.path.splitext(os.path.basename(file_name))[0]
 
-    # create the procset name
-    procset_name = "psg_%s %i %i" % ( var_name, major, minor, )
+    def load(module):
+        ps = mapped(file_name)
+        try:
+            major, minor = revision_re.search(ps).groups()
+            major, minor = int(major), int(minor)
 
-    # DSC procset
-    section = dsc_section(info="procset %s" % procset_name)
-    print >> section, ps
-    globals()["dsc_%s" % var_name] = dsc_resource(type="procset",
-                                                  name=procset_name,
-                                                  section=section,
-                                                  setup_lines=None)
+            # create the procset name
+            procset_name = "psg_%s %i %i" % ( var_name, major, minor, )
+
+            # DSC procset
+            section = dsc_section(info="procset %s" % procset_name)
+            section.write(ps[:])
+            section.write("\n")
+        finally:
+            ps.close()
+
+        return dsc_resource(type="procset",
+                            name=procset_name,
+                            section=section,
+                            setup_lines=None)
+
+    return "dsc_%s" % var_name, load
+
+sys.modules[__name__] = lazy_module(sys.modules[__name__],
+                                    dict(map(procset_loader, files)))
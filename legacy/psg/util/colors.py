@@ -25,6 +25,8 @@
 ##
 ##  I have added a copy of the GPL in the file gpl.txt.
 
+from binascii import unhexlify
+
 def rgb(r, g, b):
     return "%f %f %f setrgbcolor " % ( float(r), float(g), float(b), )
 
@@ -37,6 +39,16 @@ def grey(g):
 
 gray = grey
     
+std_colors = { "white": "ffffff",
+               "black": "000000",
+               "red": "ff0000",
+               "green": "00ff00",
+               "blue": "0000ff" }
+
+# The PostScript representation of each of the 256 values a color channel
+# of a web color may take.
+_byte2ps = [ "%f" % (a / 255.0) for a in range(256) ]
+
 def web_color_to_ps_command(color):
     """
     Take a web-compatible hexadecimal tuple as a string and return a
@@ -45,37 +57,36 @@ def web_color_to_ps_command(color):
     # Make sure we have a legal color string
     color = color.lower().strip()
 
-    std_colors = { "white": "ffffff",
-                   "black": "000000",
-                   "red": "ff0000",
-                   "green": "00ff00",
-                   "blue": "0000ff" }
-
-    if std_colors.has_key(color):
+    if color in std_colors:
         color = std_colors[color]
 
-    if color[0] == "#": color = color[1:]
-    if len(color) > 6: color = color[:5]
+    if color[:1] == "#": color = color[1:]
+    if len(color) > 6: color = color[:6]
     if len(color) != 6: color += "0" * (6 - len(color))
-    
-    red = int(color[:2], 16)
-    green = int(color[2:4], 16)
-    blue = int(color[-2:], 16)
 
-    return rgb( red / 255.0, green / 255.0, blue / 255.0, )
+    red, green, blue = map(ord, unhexlify(color))
+
+    return "%s %s %s setrgbcolor " % ( _byte2ps[red],
+                                       _byte2ps[green],
+                                       _byte2ps[blue], )
 
 class color:
+    """
+    Colors are not changed once they are created. The subclasses
+    compute their PostScript command in their constructor, because the
+    same color is usually set many times in a document.
+    """
+    _ps = ""
+
     def __str__(self):
-        return ""
+        return self._ps
 
 class rgb_color(color):
     def __init__(self, r, g, b):
         self.r = r
         self.g = g
         self.b = b
-
-    def __str__(self):
-        return rgb(self.r, self.g, self.b)
+        self._ps = rgb(r, g, b)
 
 class cmyk_color(color):
     def __init__(self, c, m, y, k):
@@ -83,23 +94,17 @@ class cmyk_color(color):
         self.m = m
         self.y = y
         self.k = k
-
-    def __str__(self):
-        return cmyk(self.c, self.m, self.y, self.k)
+        self._ps = cmyk(c, m, y, k)
         
 class grey_color(color):
     def __init__(self, g):
         self.g = g
-
-    def __str__(self):
-        return grey(self.g)
+        self._ps = grey(g)
 
 class web_color(color):
     def __init__(self, color_representation):
         self.color = color_representation
-
-    def __str__(self):
-        return web_color_to_ps_command(self.color)
+        self._ps = web_color_to_ps_command(color_representation)
 
 
 white = grey_color(1.0)
@@ -28,11 +28,11 @@
 import re, subfile, struct
 from measure import bounding_box
 
-hires_bbre = re.compile(
-    r"%%HiResBoundingBox: (-?\d+(?:\.\d+)?) (-?\d+(?:\.\d+)?) "
-    r"(-?\d+(?:\.\d+)?) (-?\d+(?:\.\d+)?)")
-bbre = re.compile(r"%%BoundingBox: (-?\d+(?:\.\d+)?) (-?\d+(?:\.\d+)?) "
-                  r"(-?\d+(?:\.\d+)?) (-?\d+(?:\.\d+)?)")
+# Matches both %%HiResBoundingBox and %%BoundingBox comments, so the
+# EPS header is scanned only once.
+bbre = re.compile(r"%%(?P<hires>HiRes)?BoundingBox:\s+(-?\d+(?:\.\d+)?)\s+"
+                  r"(-?\d+(?:\.\d+)?)\s+(-?\d+(?:\.\d+)?)\s+"
+                  r"(-?\d+(?:\.\d+)?)")
 def get_eps_bb(fp_or_eps):
     """
     Provided EPS Source code, this function will return a pair of
@@ -46,13 +46,19 @@ def get_eps_bb(fp_or_eps):
         fp_or_eps.seek(here)
     else:
         eps = remove_eps_preview(fp_or_eps[:1024])
-        
-    match = hires_bbre.search(eps)
-    if match is None:
-        match = bbre.search(eps)
+
+    # Prefer the first %%HiResBoundingBox, fall back to the first
+    # %%BoundingBox.
+    match = None
+    for candidate in bbre.finditer(eps):
+        if candidate.group("hires"):
+            match = candidate
+            break
+        elif match is None:
+            match = candidate
         
     if match is not None:
-        left, bottom, right, top = map(float, match.groups())
+        left, bottom, right, top = map(float, match.groups()[1:])
         return bounding_box(left, bottom, right, top)
     else:        
         raise ValueError("Can’t find bounding box in EPS.")
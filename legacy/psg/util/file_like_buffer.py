@@ -30,7 +30,7 @@
 Buffers for output file generation 
 """
 
-import sys, os
+import sys, os, shutil
 from string import *
 from types import *
 from cStringIO import StringIO
@@ -56,6 +56,9 @@ class file_like_buffer(list):
     """
     def __init__(self, *args):
         list.__init__(self, args)
+
+        # The bytearray write() appends strings to, see there.
+        self._tail = None
         
         for a in self:
             if type(a) != StringType and not hasattr(a, "__str__"):
@@ -65,16 +68,45 @@ class file_like_buffer(list):
     
     def write(self, s):
         """
-        Write string s to the buffer.
+        Write string s to the buffer. Strings written one after the
+        other are collected in a single bytearray at the end of the
+        list, so a lot of small writes do not each take up an entry.
+        That last entry is modified in place by the next write() of a
+        string; once anything else is added to the buffer, it is
+        replaced by an ordinary string.
+        """
+        if type(s) == StringType:
+            tail = self._tail
+            if tail is not None and len(self) > 0 and self[-1] is tail:
+                tail += s
+            else:
+                self._end_tail()
+                self._tail = bytearray(s)
+                list.append(self, self._tail)
+        else:
+            self.append(s)
+
+    def _end_tail(self):
+        """
+        Replace the bytearray write() has been appending to by a string,
+        so it will not change anymore.
         """
-        self.append(s)
+        tail = self._tail
+        if tail is not None:
+            if len(self) > 0 and self[-1] is tail:
+                self[-1] = str(tail)
+            self._tail = None
 
     def writelines(self, l):
         """
-        Writes a sequence of strings to the buffer. Uses the append
-        operator to check if all of l's elements are strings.
+        Writes a sequence of strings to the buffer. Like append(), this
+        checks if all of l's elements are strings and skips None.
         """
-        for a in l: self.append(l)
+        items = [ a for a in l if a is not None ]
+        for a in items:
+            self.check(a)
+        self._end_tail()
+        list.extend(self, items)
 
     __add__ = writelines # Use append() because of type checking.
 
@@ -90,13 +122,35 @@ class file_like_buffer(list):
 
     def write_to(self, fp):
         """
-        Write the buffer to file pointer fp.
+        Write the buffer to file pointer fp. The strings in this
+        buffer and in nested file_like_buffers are collected and
+        written in one call; only objects with a write_to() method of
+        their own are written separately.
+        """
+        batch = []
+        self._flatten(batch, fp)
+        if batch:
+            fp.write(join(batch, ""))
+
+    def _flatten(self, batch, fp):
+        """
+        Append the strings in this buffer to the `batch` list, recursing
+        into nested file_like_buffers that use this class’ write_to().
+        Before any other object is written to `fp`, the batch is
+        flushed.
         """
         for a in self:
             if hasattr(a, "write_to"):
-                a.write_to(fp)
+                if isinstance(a, file_like_buffer) and \
+                       a.write_to.im_func is file_like_buffer.write_to.im_func:
+                    a._flatten(batch, fp)
+                else:
+                    if batch:
+                        fp.write(join(batch, ""))
+                        del batch[:]
+                    a.write_to(fp)
             else:
-                fp.write(str(a))
+                batch.append(str(a))
                 
     def append(self, what):
         """
@@ -106,10 +160,12 @@ class file_like_buffer(list):
             return
         else:
             self.check(what)        
+            self._end_tail()
             list.append(self, what)
 
     def insert(self, idx, what):
         self.check(what)
+        self._end_tail()
         list.insert(self, idx, what)
             
     def prepend(self, what):
@@ -140,14 +196,9 @@ class file_as_buffer:
         # Make sure the file pointer is at the desired position,
         # that is, the one, we were initialized with.
         self.fp.seek(self.filepointer)
-        
-        while True:
-            s = self.fp.read(1024)
-            if s == "":
-                break
-            else:
-                fp.write(s)
+        shutil.copyfileobj(self.fp, fp, 65536)
 
     def as_string(self):
+        self.fp.seek(self.filepointer)
         return self.fp.read()
     
@@ -30,7 +30,9 @@
 Misc utility functions and classes.
 """
 
-import sys, os
+import sys, os, re, struct, shutil, mmap
+from binascii import hexlify
+from collections import deque
 from string import *
 from types import *
 
@@ -46,9 +48,10 @@ def cdr(l): return l[1:]
 tail = cdr
 
 def toppop(l):
-    ret = l[0]
-    del l[0]
-    return ret
+    if isinstance(l, deque):
+        return l.popleft()
+    else:
+        return l.pop(0)
 
 
 class line_iterator:
@@ -61,7 +64,10 @@ class line_iterator:
     newline (because that's the buffer size). This function is binary
     save, no newline transformations are performed.
 
-    FIXME: This needs to be rewriten! Best in C, I guess.
+    The file's own readline() does most of the work. Only lines that
+    contain a \r not followed by their \n need to be cut short. An
+    mmap (see mapped()) is searched directly, because its readline()
+    does not take a size.
     """
     def __init__(self, fp):
         """
@@ -79,42 +85,53 @@ class line_iterator:
             self.fp.seek(self.last_line_length, 1)
             return self.last_line
 
-        old = self.fp.tell()
-        buffer = self.fp.read(10240)
+        line = self._readline()
 
-        bytes_read = len(buffer)
-        if bytes_read == 0: # eof
+        length = len(line)
+        if length == 0: # eof
             raise StopIteration
-        else:
-            unix_index = buffer.find("\n")
-            mac_index = buffer.find("\r")
-
-            if unix_index == -1 and mac_index == -1:
-                return buffer
-            else:
-                if unix_index == -1: unix_index = len(buffer)
-                if mac_index == -1: mac_index = len(buffer)
-
-            if unix_index == mac_index + 1:
-                eol = mac_index + 1
-            elif unix_index > mac_index:
-                eol = mac_index
-            else:
-                eol = unix_index
-
-            ret = buffer[:eol+1]
 
-            self.last_line_length = len(ret)
-            self.fp.seek(old + self.last_line_length, 0)
+        # readline() splits at \n only. Cut the line after the
+        # first \r unless that is part of the \r\n that ends it, or
+        # after 10240 bytes, and move the seek pointer back accordingly.
+        window = min(length, 10240)
+        mac_index = line.find("\r", 0, window)
+        if mac_index == -1:
+            eol = window
+        elif mac_index + 1 < window and line[mac_index + 1] == "\n":
+            eol = mac_index + 2
+        else:
+            eol = mac_index + 1
 
-            self.last_line = ret
+        if eol < length:
+            self.fp.seek(eol - length, 1)
+            line = line[:eol]
 
-            self.line_number += 1
+        self.last_line_length = eol
+        self.last_line = line
+        self.line_number += 1
 
-            return ret
+        return line
 
     readline = next
 
+    def _readline(self):
+        r"""
+        Read up to and including the next \n, but never more than the
+        longest line we return, so a file with \r line endings (or
+        none) isn’t read over and over.
+        """
+        fp = self.fp
+        if isinstance(fp, mmap.mmap):
+            start = fp.tell()
+            end = fp.find("\n", start, start + 10240)
+            if end == -1:
+                return fp.read(10240)
+            else:
+                return fp.read(end + 1 - start)
+        else:
+            return fp.readline(10240)
+
     def rewind(self):
         """
         'Rewind' the file to the line before this one.
@@ -130,52 +147,197 @@ class line_iterator:
         return self
 
 
-def copy_linewise(frm, to, ignore_comments=False):
+# A DSC comment line (one that starts with %%) including its newline,
+# which may be \r\n, \n or \r as for the line_iterator above.
+_dsc_comment_re = re.compile(r"(?:\A|(?<=[\r\n]))%%[^\r\n]*(?:\r\n|\r|\n|\Z)")
+
+def _without_dsc_comments(data):
+    if "%%" in data:
+        return _dsc_comment_re.sub("", data)
+    else:
+        return data
+
+def copy_linewise(frm, to, ignore_comments=False, block_size=65536):
     """
-    This makes sure that all PostScript comments end with a regular
-    Unix newline. (I'm not sure, what PostScript interpreters think of
-    mixed-newline files.) Otherwise it does not alter the input stream
-    and should be binary safe.
+    Copy the rest of the file `frm` to `to`, unaltered. If
+    `ignore_comments` is set, DSC comment lines (those starting with %%)
+    are left out. The file is copied in blocks of `block_size` bytes.
     """
-    last_char = ""
-    for line in line_iterator(frm):
-        if not (ignore_comments and line.startswith("%%")):
-            to.write(line)
-
-        #if line.startswith("%"):
-        #    if last_char != "\n": to.write("\n")
-        #    to.write(strip(line))
-        #    to.write("\n")
-        #    last_char = "\n"
-        #else:
-        #    to.write(line)
-        #    if len(line) > 0:
-        #        last_char = line[-1]
+    if not ignore_comments:
+        shutil.copyfileobj(frm, to, block_size)
+        return
+
+    # The incomplete line at the end of each block is carried over to
+    # the next one, so the regular expression only ever sees complete
+    # lines until the end of the file is reached. It is kept as a list
+    # of chunks, so a long line is not copied for every block read.
+    pending = []
+    while True:
+        block = frm.read(block_size)
+        if not block:
+            break
+
+        # A \r at the very end may be the first half of a \r\n.
+        if block.endswith("\r"):
+            eol = max(block.rfind("\n", 0, -1), block.rfind("\r", 0, -1)) + 1
+        else:
+            eol = max(block.rfind("\n"), block.rfind("\r")) + 1
+
+        if eol == 0:
+            pending.append(block)
+        else:
+            pending.append(block[:eol])
+            to.write(_without_dsc_comments("".join(pending)))
+            pending = [ block[eol:] ]
+
+    rest = "".join(pending)
+    if rest:
+        to.write(_without_dsc_comments(rest))
 
 class ordered_set(list):
     """
     Technically an ordered_set is a list, not a set. What it has in
     common with a set is that it will check whether a new element is
-    already on the list and if so, not append it a second time.
+    already on the list and if so, not append it a second time. The
+    keys of the elements are kept in an actual set for that check.
     """
     def __init__(self, iterable=[]):
         list.__init__(self)
-        map(self.append, iterable)
+        self._keys = set()
+        for what in iterable:
+            self.append(what)
+
+    def key(self, what):
+        """
+        Return the hashable key that identifies `what` in this set. By
+        default, this is the element itself or its id() if it is not
+        hashable. Subclasses whose elements define __eq__() overwrite
+        this to match.
+        """
+        try:
+            hash(what)
+        except TypeError:
+            return id(what)
+        else:
+            return what
+
+    def __contains__(self, what):
+        return self.key(what) in self._keys
 
     def append(self, what):
-        if what in self:
+        key = self.key(what)
+        if key in self._keys:
             return
         else:
+            self._keys.add(key)
             list.append(self, what)
 
     add = append
 
     def insert(self, idx, what):
-        if what in self:
+        key = self.key(what)
+        if key in self._keys:
             return
         else:
+            self._keys.add(key)
             list.insert(self, idx, what)
 
+    def _update_keys(self):
+        self._keys = set(map(self.key, self))
+
+    # The other methods that modify the list call the list’s own and
+    # rebuild the set of keys afterwards. Like those of a list, extend()
+    # and += do not check for elements already in the set.
+    def __setitem__(self, idx, what):
+        list.__setitem__(self, idx, what)
+        self._update_keys()
+
+    def __delitem__(self, idx):
+        list.__delitem__(self, idx)
+        self._update_keys()
+
+    def __setslice__(self, i, j, sequence):
+        list.__setslice__(self, i, j, sequence)
+        self._update_keys()
+
+    def __delslice__(self, i, j):
+        list.__delslice__(self, i, j)
+        self._update_keys()
+
+    def __iadd__(self, other):
+        list.__iadd__(self, other)
+        self._update_keys()
+        return self
+
+    def extend(self, iterable):
+        list.extend(self, iterable)
+        self._update_keys()
+
+    def remove(self, what):
+        list.remove(self, what)
+        self._update_keys()
+
+    def pop(self, *args):
+        ret = list.pop(self, *args)
+        self._update_keys()
+        return ret
+
+def mapped(path):
+    """
+    Return a read-only memory map of the file at `path`. It provides the
+    read(), seek() and tell() methods of a file opened in binary mode,
+    but the kernel pages the data in as needed instead of it being
+    copied through a read buffer. Its readline() does not take a size;
+    line_iterator knows about this.
+    """
+    fp = open(path, "rb")
+    try:
+        # The map keeps its own file descriptor.
+        return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        fp.close()
+
+class lazy_module(ModuleType):
+    """
+    A stand-in for a module whose expensive attributes are only created
+    when they are accessed for the first time. A module using this puts
+
+       sys.modules[__name__] = lazy_module(sys.modules[__name__],
+                                           { "name": factory, ... })
+
+    at its very end. Each factory is called with the lazy_module as its
+    only argument (so it may access other lazy attributes through it) and
+    its result is stored in the module's namespace, so it is called at
+    most once.
+    """
+    def __init__(self, module, factories):
+        ModuleType.__init__(self, module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+
+        # Keep the original module alive. Python clears the globals of
+        # collected modules and those are still used by the factories.
+        self._module = module
+        self._factories = factories
+
+    def __getattr__(self, name):
+        try:
+            factory = self._factories[name]
+        except KeyError:
+            raise AttributeError(name)
+
+        ret = factory(self)
+        setattr(self, name, ret)
+        return ret
+
+# Control characters, backslash and parentheses are written as octal
+# escapes in PostScript string literals.
+_ps_escape_re = re.compile(r"[\x00-\x1f\\()]")
+_ps_escapes = dict([ ( chr(a), "\\%03o" % a, )
+                     for a in range(32) + map(ord, "\\()") ])
+
+def _ps_escape_char(match):
+    return _ps_escapes[match.group()]
+
 def ps_escape(s, always_parenthesis=True):
     """
     Return a PostScript string literal containing s.
@@ -187,25 +349,28 @@ def ps_escape(s, always_parenthesis=True):
     if not  always_parenthesis and " " in s:
         always_parenthesis = True
 
-    if always_parenthesis: ret = ["("]
-    for a in map(ord, s):
-        if (a < 32) or (chr(a) in r"\()"):
-            ret.append(r"\03%o" % a)
-        else:
-            ret.append(chr(a))
+    ret = _ps_escape_re.sub(_ps_escape_char, s)
 
-    if always_parenthesis: ret.append(")")
-    return join(ret, "")
+    if always_parenthesis:
+        return "(" + ret + ")"
+    else:
+        return ret
 
 def join80(collection):
     r"""
     Like string.join(collection, ' ') except that it uses \n occasionly to
     create 80char lines.
     """
-    ret = []
+    ret = bytearray()
     length = 0
+    ws = ""
 
     for a in collection:
+        # Each separator is chosen by the length of the line so far,
+        # including the string that precedes it.
+        ret += ws
+        ret += a
+
         if length + len(a) > 80:
             ws = "\n"
             length = 0
@@ -213,13 +378,7 @@ def join80(collection):
             ws = " "
             length += len(a) + 1
 
-        ret.append(a)
-        ret.append(ws)
-
-    if len(ret) > 1:
-        del ret[-1]
-
-    return join(ret, "")
+    return str(ret)
 
 def eight_squares(canvas, spacing=mm(6)):
     """
@@ -252,36 +411,29 @@ def pfb2pfa(pfb, pfa):
     """
 
     while True:
-        r = pfb.read(1)
-        if ord(r) != 128:
-            raise PFBError("Not a pfb file! (%s)" % repr(r + pfb.read(50)))
+        header = pfb.read(2)
+        if len(header) < 2 or ord(header[0]) != 128:
+            raise PFBError("Not a pfb file! (%s)" % repr(header + pfb.read(50)))
 
-        t = ord(pfb.read(1))
+        t = ord(header[1])
 
         if t == 1 or t == 2:
-            l1 = ord(pfb.read(1))
-            l2 = ord(pfb.read(1))
-            l3 = ord(pfb.read(1))
-            l4 = ord(pfb.read(1))
-
-            l = l1 | l2 << 8 | l3 << 16 | l4 << 24
+            l, = struct.unpack("<I", pfb.read(4))
+            segment = pfb.read(l)
 
         if t == 1:
-            for i in range(l):
-                c = pfb.read(1)
-                if c == "\r":
-                    pfa.write("\n")
-                else:
-                    pfa.write(c)
+            pfa.write(segment.replace("\r", "\n"))
 
         elif t == 2:
-            for i in range(l):
-                c = pfb.read(1)
-                pfa.write("%02x" % ord(c))
-                if (i + 1) % 30 == 0:
-                    pfa.write("\n")
-
-            pfa.write("\n")
+            # 30 bytes, that is 60 hex digits, to a line and a newline
+            # at the end of the segment.
+            hexdigits = hexlify(segment)
+            for i in range(0, len(hexdigits), 60):
+                pfa.write(hexdigits[i:i+60])
+                pfa.write("\n")
+
+            if len(hexdigits) % 60 == 0:
+                pfa.write("\n")
         elif t == 3:
             break
         else:
@@ -294,6 +446,7 @@ class pfb2pfa_buffer(file_like_buffer):
     pfb file, will write a pfa file into its output file.
     """
     def __init__(self, pfb_fp):
+        file_like_buffer.__init__(self)
         self.pfb = pfb_fp
 
     def write_to(self, fp):
@@ -0,0 +1,54 @@
+import os, os.path as op, tempfile, unittest
+
+try:
+    from t4.psg.util.misc import mapped, line_iterator
+    from t4.psg.fonts.afm_metrics import afm_metrics
+except ImportError:
+    afm_metrics = None
+
+afm_path = op.join(op.dirname(__file__), "..", "psg", "fonts",
+                   "computer_modern", "cmunss.afm")
+
+def glyphs(metrics):
+    return sorted([ ( code, glyph.ps_name, glyph.width, )
+                    for code, glyph in metrics.items() ])
+
+@unittest.skipIf(afm_metrics is None, "t4.psg is not importable")
+class LineIteratorTest(unittest.TestCase):
+    def setUp(self):
+        with open(afm_path, "rb") as fp:
+            self.data = fp.read()
+        with open(afm_path, "rb") as fp:
+            self.expected = glyphs(afm_metrics(fp))
+
+    def mac_file(self):
+        """
+        Return the path of a copy of the AFM file with \\r line endings.
+        """
+        fd, path = tempfile.mkstemp(suffix=".afm")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(self.data.replace("\r\n", "\n").replace("\n", "\r"))
+        return path
+
+    def test_lines(self):
+        fp = mapped(self.mac_file())
+        lines = line_iterator(fp)
+        self.assertEqual(lines.next(), "StartFontMetrics 2.0\r")
+        second = lines.next()
+        lines.rewind()
+        self.assertEqual(lines.next(), second)
+        self.assertEqual(fp.tell(), 21 + len(second))
+
+    def test_mapped(self):
+        self.assertEqual(glyphs(afm_metrics(mapped(afm_path))),
+                         self.expected)
+
+    def test_mac_line_endings(self):
+        path = self.mac_file()
+        with open(path, "rb") as fp:
+            self.assertEqual(glyphs(afm_metrics(fp)), self.expected)
+        self.assertEqual(glyphs(afm_metrics(mapped(path))), self.expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import os.path as op, unittest
+
+try:
+    from t4.psg.fonts.type1 import type1
+    from t4.psg.fonts import computer_modern, bitstream_vera
+    from t4.psg.util.misc import pfb2pfa_buffer
+except ImportError:
+    type1 = None
+
+@unittest.skipIf(type1 is None, "t4.psg is not importable")
+class PathTest(unittest.TestCase):
+    """
+    Fonts loaded from a path are read through mapped() rather than a
+    file object.
+    """
+    def check(self, font, ps_name):
+        self.assertEqual(font.ps_name, ps_name)
+        self.assertEqual(font.metrics[72].ps_name, "H")
+        self.assertTrue(font.metrics[72].width > 0)
+
+        pfa = pfb2pfa_buffer(font.main_font_file()).as_string()
+        self.assertTrue(pfa.startswith("%!PS-AdobeFont"))
+
+    def test_type1(self):
+        here = op.dirname(bitstream_vera.__file__)
+        font = type1(op.join(here, "BitstreamVeraSans-Roman.pfb"),
+                     op.join(here, "BitstreamVeraSans-Roman.afm"))
+        self.check(font, "BitstreamVeraSans-Roman")
+
+    def test_lazy_loader(self):
+        self.check(computer_modern.sansserif(), "CMUSansSerif")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,7 +24,8 @@
 ##
 ##  I have added a copy of the GPL in the file gpl.txt.
 
-import os, io
+import os, io, re
+from collections import deque
 from collections.abc import Iterable
 
 STRING_ENCODING="utf-8"
@@ -35,6 +36,14 @@ def encode(s):
     else:
         return s
 
+# Control characters, backslash and parentheses are written as octal
+# escapes in PostScript string literals.
+_ps_escape_re = re.compile(rb"[\x00-\x1f\\()]")
+_ps_escapes = { bytes((a,)): b"\\%03o" % a for a in [*range(32), *br"\()"] }
+
+def _ps_escape_char(match):
+    return _ps_escapes[match.group()]
+
 def ps_escape(s, always_parenthesis:bool=True) -> bytes:
     """
     Return a PostScript string literal containing s.
@@ -42,29 +51,41 @@ def ps_escape(s, always_parenthesis:bool=True) -> bytes:
     @param always_parenthesis: If set, the returned literal will always
       have ()s around it. If it is not set, this will only happen, if
       “s” contains a space char.
-
-    This should probably be re-writen in C.
     """
     chars = encode(s)
 
     if not always_parenthesis and b" " in chars:
         always_parenthesis = True
 
-    ret = bytearray()
+    if _ps_escape_re.search(chars) is not None:
+        chars = _ps_escape_re.sub(_ps_escape_char, chars)
+
     if always_parenthesis:
-        ret.extend(b"(")
+        return b"(" + chars + b")"
+    else:
+        return bytes(chars)
 
-    for a in chars:
-        if (a < 32) or (a in br"\()"):
-            ret.extend(br"\03%o" % a)
-        else:
-            ret.append(a)
 
-    if always_parenthesis:
-        ret.extend(b")")
+def _float_literal(value):
+    # Strip trailing zeros and, if nothing is left after it, the dot.
+    return (b"%.3f" % value).rstrip(b"0").rstrip(b".")
+
+def _array_literal(value):
+    return b"[ " + b" ".join([ps_literal(v) for v in value]) + b" ]"
 
-    return bytes(ret)
+def _str_literal(value):
+    return encode(str(value))
 
+# ps_literal() looks up the conversion function for the most common types
+# here, so it does not have to go through its chain of type checks.
+_literal_functions = { str: ps_escape,
+                       bytes: ps_escape,
+                       bytearray: ps_escape,
+                       float: _float_literal,
+                       int: _str_literal,
+                       bool: _str_literal,
+                       list: _array_literal,
+                       tuple: _array_literal, }
 
 def ps_literal(value) -> bytes:
     """
@@ -74,19 +95,96 @@ def ps_literal(value) -> bytes:
     according to the DSC's rules as layed out in the specifications on
     page 36 (section 4.6, on <text>).
     """
-    if type(value) in ( str, bytes, bytearray, ):
-        return ps_escape(value, True)
-    elif type(value) is float:
-        ret = bytearray(b"%.3f" % value)
-        while ret[-1] == b"0"[0]:
-            del ret[-1]
-        if ret[-1] == b"."[0]:
-            del ret[-1]
-        return ret
+    function = _literal_functions.get(type(value))
+    if function is not None:
+        return function(value)
     elif isinstance(value, Iterable):
-        return b"[ " + b" ".join([ps_literal(v) for v in value]) + b" ]"
+        return _array_literal(value)
+    else:
+        return _str_literal(value)
+
+
+# Block size for copying files in copy_file() below.
+COPY_BLOCK_SIZE = 1 << 20
+
+def copy_file(src, fp, length=None):
+    """
+    Copy `length` bytes, or everything up to the end of the file, from
+    `src`’s current position to `fp`. If both are files on disk, this
+    uses os.sendfile() and the data is copied by the kernel. Otherwise
+    it is read and written in large blocks. Afterwards, `src`’s position
+    is right after the copied data.
+    """
+    try:
+        src_fd = src.fileno()
+        offset = src.tell()
+    except (AttributeError, OSError, ValueError):
+        # Not a file on disk, or not seekable like a pipe.
+        pass
+    else:
+        offset, length, done = _sendfile(src_fd, offset, fp, length)
+        src.seek(offset)
+        if done:
+            return
+
+    _copy_blocks(src, fp, length)
+
+def _sendfile(src_fd, offset, fp, length):
+    """
+    Copy `length` bytes, or everything up to the end of the file, from
+    file descriptor `src_fd` starting at `offset` to `fp` using
+    os.sendfile(). Return the offset after the data copied, the length
+    that is left to be copied and whether the copy is complete. It is
+    not, if `fp` is not a file on disk or the system does not support
+    os.sendfile() for these files.
+    """
+    if not hasattr(os, "sendfile"):
+        return offset, length, False
+
+    try:
+        fp_fd = fp.fileno()
+    except (AttributeError, OSError, ValueError):
+        return offset, length, False
+
+    # Write what fp has buffered before we write past it.
+    fp.flush()
+
+    try:
+        while length is None or length > 0:
+            if length is None:
+                count = COPY_BLOCK_SIZE
+            else:
+                count = min(length, COPY_BLOCK_SIZE)
+
+            sent = os.sendfile(fp_fd, src_fd, offset, count)
+            if sent == 0:
+                break
+
+            offset += sent
+            if length is not None:
+                length -= sent
+    except OSError:
+        return offset, length, False
     else:
-        return encode(str(value))
+        return offset, length, True
+
+def _copy_blocks(src, fp, length):
+    """
+    The part of copy_file() that reads and writes the data.
+    """
+    while length is None or length > 0:
+        if length is None:
+            count = COPY_BLOCK_SIZE
+        else:
+            count = min(length, COPY_BLOCK_SIZE)
+
+        data = src.read(count)
+        if not data:
+            break
+
+        fp.write(data)
+        if length is not None:
+            length -= len(data)
 
 
 class PSBuffer(object):
@@ -95,34 +193,70 @@ class PSBuffer(object):
     to be written to a file (which must be in binary mode). All methods
     also accept strings as input, which will be converted to bytes.
     """
+    # Subclasses without __slots__ of their own get a __dict__ as usual.
+    __slots__ = ( "_things", "_tail", )
+
     def __init__(self, *things):
         self._things = list()
+
+        # The bytearray at the end of _things that bytes written
+        # one after the other are collected in.
+        self._tail = None
+
         self.write(*things)
 
     def _convert(self, thing):
-        if type(thing) is bytes or \
-           isinstance(thing, bytearray) \
-           or hasattr(thing, "write_to"):
+        # Most things written are bytes already, so check for the common
+        # types first. write_to() is looked up on the class, which is
+        # cheaper than hasattr() on the instance when it isn’t there.
+        t = type(thing)
+        if t is bytes or t is bytearray:
             return thing
-        elif hasattr(thing, "__bytes__"):
-            return bytes(thing)
+        elif t is str:
+            return thing.encode(STRING_ENCODING)
         elif thing is None:
             return b""
-        elif type(thing) is float:
+        elif isinstance(thing, bytearray) or \
+             getattr(t, "write_to", None) is not None:
+            return thing
+        elif hasattr(thing, "__bytes__"):
+            return bytes(thing)
+        elif t is float:
             return ps_literal(thing)
         else:
-            return bytes(str(thing).encode(STRING_ENCODING))
+            return str(thing).encode(STRING_ENCODING)
 
     def write(self, *things):
-        self._things.extend([ self._convert(thing) for thing in things ])
+        """
+        Add `things` to the buffer. Consecutive bytes are copied into
+        a single bytearray, so they are written to the file in one go.
+        Objects with a write_to() method are kept as they are.
+        """
+        _things = self._things
+        for thing in things:
+            thing = self._convert(thing)
+
+            if hasattr(thing, "write_to"):
+                _things.append(thing)
+            elif _things and _things[-1] is self._tail:
+                self._tail.extend(thing)
+            else:
+                # A fresh bytearray, so we never modify the caller’s.
+                self._tail = bytearray(thing)
+                _things.append(self._tail)
 
     def append(self, thing):
         self.write(thing)
         return thing
 
     def prepend(self, *things):
-        for thing in things:
-            self._things.insert(0, self._convert(thing))
+        """
+        Insert each of `things` at the start of the buffer, one after
+        the other, so that the last one ends up first.
+        """
+        converted = [ self._convert(thing) for thing in things ]
+        converted.reverse()
+        self._things[:0] = converted
 
     def print(self, *args, sep=b" ", end=b"\n"):
         """
@@ -130,20 +264,38 @@ class PSBuffer(object):
         write() does and does what one would expect.
         """
         if args:
-            for a in args[:-1]:
-                self.write(a)
-                if sep:
-                    self.write(sep)
-
-            self.write(args[-1])
+            # Everything goes to a single write() call, which subclasses
+            # may extend, instead of one for each argument and separator.
+            if sep:
+                things = [ sep ] * (len(args) * 2 - 1)
+                things[::2] = args
+            else:
+                things = list(args)
 
             if end:
-                self.write(end)
+                things.append(end)
+
+            self.write(*things)
+
+    # Size of the buffer used by write_to() for unbuffered files.
+    write_buffer_size = 1 << 20
 
     def write_to(self, fp):
         """
-        `fp` must be in binary mode.
+        `fp` must be in binary mode. An unbuffered file (io.RawIOBase)
+        is wrapped in an io.BufferedWriter while we write to it, so
+        the nested buffers’ writes do not each become a system call.
         """
+        if isinstance(fp, io.RawIOBase):
+            buffered = io.BufferedWriter(fp, self.write_buffer_size)
+            try:
+                self.write_to(buffered)
+            finally:
+                buffered.flush()
+                # Keep the BufferedWriter from closing fp.
+                buffered.detach()
+            return
+
         for thing in self._things:
             if hasattr(thing, "write_to"):
                 thing.write_to(fp)
@@ -154,8 +306,45 @@ class PSBuffer(object):
 
     def clear(self):
         self._things = []
+        self._tail = None
+
+    # Maximum number of released buffers kept for reuse by acquire().
+    pool_size = 1024
+
+    @classmethod
+    def acquire(cls, *things):
+        """
+        Return an empty buffer of this class, containing `things`. It is
+        taken from the buffers previously passed to release() if
+        possible. This is only useful for classes that keep no state
+        beyond their content, like PSBuffer itself.
+        """
+        pool = _buffer_pools.get(cls)
+        if pool:
+            ret = pool.pop()
+            ret.write(*things)
+            return ret
+        else:
+            return cls(*things)
+
+    def release(self):
+        """
+        Clear this buffer and keep it for reuse by acquire(). The buffer
+        must not be used afterwards, not even through a reference
+        retained elsewhere, such as another buffer it has been written to.
+        """
+        self.clear()
+
+        pool = _buffer_pools.setdefault(self.__class__, deque())
+        if len(pool) < self.pool_size:
+            pool.append(self)
+
+# Map PSBuffer classes to the deques of their released instances.
+_buffer_pools = {}
 
 class FileAsBuffer(object):
+    __slots__ = ( "fp", )
+
     def __init__(self, fp):
         """
         `fp`: File object (in binary mode)
@@ -163,16 +352,7 @@ class FileAsBuffer(object):
         self.fp = fp
 
     def write_to(self, fp):
-        # Make sure the file pointer is at the desired position,
-        # that is, the one, we were initialized with.
-
-        while True:
-            s = self.fp.read(1024)
-
-            if not s:
-                break
-            else:
-                fp.write(s)
+        copy_file(self.fp, fp)
 
 def Subfile(fp, offset, length):
     """
@@ -201,6 +381,8 @@ def Subfile(fp, offset, length):
             # return DefaultSubfile(fp, offset, length)
 
 class _Subfile(object):
+    __slots__ = ( "parent", "offset", "length", )
+
     def __init__(self, fp, offset, length):
         self.parent = fp
         self.offset = offset
@@ -283,31 +465,107 @@ class _Subfile(object):
 
     def write_to(self, fp):
         self.seek(0)
-        while True:
-            r = self.read(1024)
-            if len(r) == 0:
-                break
-            else:
-                fp.write(r)
+        copy_file(self.parent, fp, self.length)
 
 
 class FilesystemSubfile(_Subfile):
+    """
+    A subfile of a file on disk. It reads the parent file’s descriptor
+    with os.pread() at its own position, so neither a file descriptor
+    of its own nor saving and restoring the parent’s position are
+    needed. The parent file must stay open while the subfile is used.
+    """
+    __slots__ = ( "fd", "seek_pointer", )
+
     def __init__(self, fp, offset, length):
         if not hasattr(fp, "fileno"):
             raise ValueError("A FilesystemSubfile must always be used with "
                              "a regular file, owning a fileno() method")
 
-        parent = os.fdopen(os.dup(fp.fileno()), "br")
-        if isinstance(fp, self.__class__):
-            _Subfile.__init__(self, parent, offset+fp.offset, length)
-        else:
-            _Subfile.__init__(self, parent, offset, length)
+        if isinstance(fp, FilesystemSubfile):
+            offset += fp.offset
+            fp = fp.parent
 
+        self.fd = fp.fileno()
+        _Subfile.__init__(self, fp, offset, length)
 
     def fileno(self):
-        return self.parent.fileno()
+        return self.fd
+
+    def read(self, size=None):
+        left = self.length - self.seek_pointer
+        if size is None or size < 0 or size > left:
+            size = left
+
+        if size < 1:
+            return b""
+        else:
+            data = os.pread(self.fd, size, self.offset + self.seek_pointer)
+            self.seek_pointer += len(data)
+            return data
+
+    def readline(self, size=None):
+        start = self.seek_pointer
+
+        parts = []
+        while size is None or size > 0:
+            chunk = self.read(256 if size is None else min(size, 256))
+            if not chunk:
+                break
+
+            eol = chunk.find(b"\n") + 1
+            if eol > 0:
+                parts.append(chunk[:eol])
+                self.seek_pointer = start + sum(map(len, parts))
+                break
+
+            parts.append(chunk)
+            if size is not None:
+                size -= len(chunk)
+
+        return b"".join(parts)
+
+    def readlines(self, sizehint=80):
+        while True:
+            line = self.readline()
+            if line:
+                yield line
+            else:
+                break
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            if offset < 0: raise IOError("Can't seek beyond file start")
+            self.seek_pointer = offset
+        elif whence == 1:
+            if self.seek_pointer + offset < 0:
+                raise IOError("Invalid argument (seek beyond file start)")
+            self.seek_pointer += offset
+        elif whence == 2:
+            self.seek_pointer = self.length + offset
+        else:
+            raise IOError("Invalid argument (don't know how to seek)")
+
+    def tell(self):
+        return self.seek_pointer
+
+    def write_to(self, fp):
+        # Let the kernel start reading the whole section right away.
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(self.fd, self.offset, self.length,
+                                 os.POSIX_FADV_WILLNEED)
+            except OSError:
+                pass
+
+        offset, length, done = _sendfile(self.fd, self.offset, fp, self.length)
+        if not done:
+            self.seek(offset - self.offset)
+            _copy_blocks(self, fp, length)
 
 class DefaultSubfile(_Subfile):
+    __slots__ = ( "seek_pointer", "parent_seek_pointer", )
+
     def __init__(self, fp, offset, length):
         _Subfile.__init__(self, fp, offset, length)
 
@@ -349,26 +607,91 @@ class DefaultSubfile(_Subfile):
         return self.seek_pointer
 
 
+_newline_re = re.compile(rb"\n")
+
 class BytesIOSubfile:
+    """
+    A read-only view of a section of an io.BytesIO object. The data
+    is not copied, which means that the BytesIO object can’t be
+    resized while the subfile exists.
+    """
+    __slots__ = ( "buffer", "seek_pointer", )
+
     def __init__(self, fp, offset, length):
-        self.fp = io.BytesIO(fp.getvalue()[offset:offset+length])
+        self.buffer = fp.getbuffer()[offset:offset+length]
+        self.seek_pointer = 0
 
-    def write_to(self, fp):
-        fp.write(self.fp.getvalue())
+    def close(self):
+        self.buffer.release()
+
+    def read(self, size=-1):
+        start = self.seek_pointer
+        if size is None or size < 0:
+            end = len(self.buffer)
+        else:
+            end = min(start + size, len(self.buffer))
+
+        self.seek_pointer = max(start, end)
+        return self.buffer[start:end].tobytes()
+
+    def readline(self, size=-1):
+        # Regular expressions search the memoryview without copying it.
+        match = _newline_re.search(self.buffer, self.seek_pointer)
+        if match is None:
+            end = len(self.buffer)
+        else:
+            end = match.end()
+
+        if size is not None and size >= 0:
+            end = min(end, self.seek_pointer + size)
+
+        return self.read(end - self.seek_pointer)
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            self.seek_pointer = offset
+        elif whence == 1:
+            self.seek_pointer += offset
+        elif whence == 2:
+            self.seek_pointer = len(self.buffer) + offset
+        else:
+            raise IOError("Invalid argument (don't know how to seek)")
+
+        if self.seek_pointer < 0:
+            raise IOError("Can't seek beyond file start")
+
+        return self.seek_pointer
+
+    def tell(self):
+        return self.seek_pointer
 
-    def __getattr__(self, name):
-        return getattr(self.fp, name)
+    def getvalue(self):
+        return self.buffer.tobytes()
+
+    def write_to(self, fp):
+        fp.write(self.buffer)
 
 class FileWrapper(object):
+    """
+    Write the content of a file from the position it had when it was
+    wrapped, each time write_to() is called. Files on disk are copied
+    with os.sendfile() by copy_file().
+    """
+    __slots__ = ( "fp", "offset", )
+
     def __init__(self, fp):
         self.fp = fp
-        if hasattr(self.fp, "write_to"):
-            self.write_to = fp.write_to
+
+        try:
+            self.offset = fp.tell()
+        except (AttributeError, OSError):
+            # Not seekable, so the file can only be written once.
+            self.offset = None
 
     def write_to(self, fp):
-        while True:
-            r = self.fp.read(1024)
-            if not r:
-                break
-            else:
-                fp.write(r) # .replace(b"\r", b"\n")
+        if hasattr(self.fp, "write_to"):
+            self.fp.write_to(fp)
+        else:
+            if self.offset is not None:
+                self.fp.seek(self.offset)
+            copy_file(self.fp, fp)
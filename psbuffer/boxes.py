@@ -24,7 +24,7 @@
 ##
 ##  I have added a copy of the GPL in the file gpl.txt.
 
-from uuid import uuid4 as uuid
+import itertools
 from typing import Sequence
 
 from .base import encode, PSBuffer, FileWrapper
@@ -37,16 +37,43 @@ class BoxBuffer(DSCBuffer):
     def __init__(self):
         super().__init__()
 
-        self.head = DSCBuffer()
-        self.head.parent = self
+        # Most boxes never use their head or tail, so these buffers
+        # are only created when accessed through the properties below.
+        self._head = None
+        self._tail_buffer = None
 
-        self.tail = DSCBuffer()
-        self.tail.parent = self
+        # What push() adds to the tail goes in front of the tail’s
+        # content, the last push() first. The parts are appended to
+        # this list in the order they are pushed and written in reverse.
+        # The list is created by the first push() with a tail.
+        self._tail_parts = None
+
+    @property
+    def head(self):
+        if self._head is None:
+            self._head = DSCBuffer()
+            self._head.parent = self
+        return self._head
+
+    @property
+    def tail(self):
+        if self._tail_buffer is None:
+            self._tail_buffer = DSCBuffer()
+            self._tail_buffer.parent = self
+        return self._tail_buffer
 
     def write_to(self, fp):
-        self.head.write_to(fp)
+        if self._head is not None:
+            self._head.write_to(fp)
+
         super().write_to(fp)
-        self.tail.write_to(fp)
+
+        if self._tail_parts is not None:
+            for part in reversed(self._tail_parts):
+                fp.write(part)
+
+        if self._tail_buffer is not None:
+            self._tail_buffer.write_to(fp)
 
     def push(self, for_head, for_tail=None):
         """
@@ -55,22 +82,31 @@ class BoxBuffer(DSCBuffer):
         append a Unix newline to them before adding them to the
         buffer.
         """
+        # Internal callers mostly pass bytes, which need no conversion.
         if for_head:
-            for_head = self._convert(for_head)
+            if type(for_head) is not bytes:
+                for_head = self._convert(for_head)
             if for_head[-1] not in b"\n\t\r ":
-                for_head += b"\n"
+                for_head = for_head + b"\n"
 
             self.head.write(for_head)
 
         if for_tail:
-            for_tail = self._convert(for_tail)
+            if type(for_tail) is not bytes:
+                for_tail = self._convert(for_tail)
             if for_tail[-1] not in b"\n\t\r ":
                 for_tail = for_tail + b"\n"
 
-            self.tail.prepend(for_tail)
+            if self._tail_parts is None:
+                self._tail_parts = []
+            self._tail_parts.append(for_tail)
 
 
 class Box(BoxBuffer, Rectangle):
+    # Written in front of the comment before and after the box’s content.
+    begin_marker = b"% begin "
+    end_marker = b"% end "
+
     def __init__(self, x, y, w, h, border=False, clip=False, comment=""):
         BoxBuffer.__init__(self)
         Rectangle.__init__(self, x, y, w, h)
@@ -79,6 +115,14 @@ class Box(BoxBuffer, Rectangle):
         self.clip = clip
         self.comment = comment
 
+        # Set by _bounding_path() on first use.
+        self._bounding_path_bytes = None
+
+        # The clip path goes into the head, so it comes after the begin
+        # marker and an IsolatedBox’s grestore ends it with the box.
+        if clip:
+            self.head.write(self._bounding_path(), b"clip % clip=True\n")
+
         self._font_instance = None
 
     @property
@@ -91,75 +135,101 @@ class Box(BoxBuffer, Rectangle):
             font_instance.setfont(self)
         self._font_instance = font_instance
 
+    @property
+    def comment(self):
+        return self._comment
+
+    @comment.setter
+    def comment(self, comment):
+        self._comment = comment
+        self._marker_lines_bytes = None
+
     @property
     def _rich_comment(self):
         return "%s: %s" % (self.__class__.__name__, self.comment)
 
+    @property
+    def _marker_lines(self):
+        """
+        The lines written before and after the box’s content as a pair
+        of bytes objects, created the first time the box is written.
+        """
+        if self._marker_lines_bytes is None:
+            ec = encode(self._rich_comment) + b"\n"
+            self._marker_lines_bytes = ( self.begin_marker + ec,
+                                         self.end_marker + ec, )
+        return self._marker_lines_bytes
+
     def write_to(self, fp):
         self.write_prolog_to(fp)
 
-        ec = encode(self._rich_comment) + b"\n"
-        fp.write(b"% begin " + ec)
+        begin_line, end_line = self._marker_lines
+        fp.write(begin_line)
         super().write_to(fp)
-        fp.write(b"% end " + ec)
+        fp.write(end_line)
 
     def write_prolog_to(self, fp):
-        if not self.border and not self.clip:
+        if not self.border:
             return
 
         prolog = DSCBuffer()
-        print = prolog.print
         comment = self._rich_comment
 
-        print("% begin prolog of", comment)
+        prolog.print("% begin prolog of", comment)
 
         if self.border:
-            print("gsave % border=True")
-            self._print_bounding_path(print)
-
             if type(self.border) is tuple:
                 color, linewidth = self.border
             else:
                 color = "0 setgray"
                 linewidth = ".1"
-            # Set color to black, line type to solid and width to 'hairline'
-            # "[] 0 setdash",
-            print(color, linewidth, " setlinewidth")
-
-            # Draw the line
-            print("stroke")
-            print("grestore % border=True")
 
-        if self.clip:
-            self._print_bounding_path(print)
-            head.print("clip % clip=True")
+            # Set color to black, line type to solid and width to 'hairline'
+            # "[] 0 setdash", and draw the line.
+            prolog.write(b"gsave % border=True\n", self._bounding_path())
+            prolog.print(color, linewidth, " setlinewidth")
+            prolog.write(b"stroke\n"
+                         b"grestore % border=True\n")
 
-        print("% end prolog of", comment)
+        prolog.print("% end prolog of", comment)
 
         prolog.write_to(fp)
 
 
-    def _print_bounding_path(self, print):
-        # Set up a bounding box path
-        print("newpath")
-        print(self.x,          self.y,          "moveto")
-        print(self.x,          self.y + self.h, "lineto")
-        print(self.x + self.w, self.y + self.h, "lineto")
-        print(self.x + self.w, self.y,          "lineto")
-        print("closepath")
+    def _bounding_path(self):
+        """
+        Return the PostScript code that sets up a path along the
+        edges of this box, as a single bytes object. It is created
+        once, subclasses whose dimensions may change must reset
+        _bounding_path_bytes to None when they do.
+        """
+        if self._bounding_path_bytes is None:
+            self._bounding_path_bytes = self._format_bounding_path()
+        return self._bounding_path_bytes
+
+    def _format_bounding_path(self):
+        left, bottom = self.x, self.y
+        right, top = self.x + self.w, self.y + self.h
+
+        # All coordinates in a single % operation. Three decimal places
+        # are well below a device pixel.
+        return (b"newpath\n"
+                b"%.3f %.3f moveto\n"
+                b"%.3f %.3f lineto\n"
+                b"%.3f %.3f lineto\n"
+                b"%.3f %.3f lineto\n"
+                b"closepath\n" % ( left, bottom,
+                                   left, top,
+                                   right, top,
+                                   right, bottom, ))
 
 class IsolatedBox(Box):
     """
     This box adds a gsave/grestore pair at the very beginning and end
     of its content.
     """
-    def write_to(self, fp):
-        self.write_prolog_to(fp)
-
-        ec = encode(self._rich_comment) + b"\n"
-        fp.write(b"gsave % begin " + ec)
-        BoxBuffer.write_to(self, fp)
-        fp.write(b"grestore % end " + ec)
+    begin_marker = b"gsave % begin "
+    end_marker = b"grestore % end "
 
 class Canvas(IsolatedBox):
     """
@@ -178,6 +248,33 @@ class Canvas(IsolatedBox):
                             " % ", self._rich_comment)
 
 
+# The PostScript code of a document level EPS resource before and after
+# the EPS file itself. See EPSBox._initialize_resource() below.
+_eps_resource_head = (b"/%(id)sImageData currentfile\n"
+                      b"<< /Filter /SubFileDecode\n"
+                      b"   /DecodeParms << /EODCount\n"
+                      b"       0 /EODString (***EOD***) >>\n"
+                      b">> /ReusableStreamDecode filter\n")
+_eps_resource_tail = (b"***EOD***\n"
+                      b"def\n"
+                      b"/%(id)s \n"
+                      b"<< /FormType 1\n"
+                      b"   /BBox [%(bbox)s]\n"
+                      b"   /Matrix [ 1 0 0 1 0 0]\n"
+                      b"   /PaintProc\n"
+                      b"   { pop\n"
+                      b"       /ostate save def\n"
+                      b"         /showpage {} def\n"
+                      b"         /setpagedevice /pop load def\n"
+                      b"         %(id)sImageData 0 setfileposition\n"
+                      b"            %(id)sImageData cvx exec\n"
+                      b"       ostate restore\n"
+                      b"   } bind\n"
+                      b">> def\n")
+
+# Numbers the EPS resources created in this process.
+_eps_counter = itertools.count(1)
+
 class EPSBox(IsolatedBox):
     """
     This is the base class for eps_image and raster_image below, which
@@ -193,7 +290,7 @@ class EPSBox(IsolatedBox):
 
     def on_parent_set(self):
         if self.resource_identifyer is None:
-            self.resource_identifyer = str(uuid())+".eps"
+            self.resource_identifyer = "psg_eps_%i.eps" % next(_eps_counter)
             self._initialize_resource()
         else:
             if not self.document_level:
@@ -213,31 +310,11 @@ class EPSBox(IsolatedBox):
             resource = ResourceSection("file", self.resource_identifyer)
             self.document.add_resource(resource)
 
-            resource.print("/%sImageData currentfile" % ps_identifyer)
-            resource.print("<< /Filter /SubFileDecode")
-            resource.print("   /DecodeParms << /EODCount")
-            resource.print("       0 /EODString (***EOD***) >>")
-            resource.print(">> /ReusableStreamDecode filter")
+            values = { b"id": ps_identifyer.encode("ascii"),
+                       b"bbox": b"%f %f %f %f" % self.as_tuple(), }
+            resource.write(_eps_resource_head % values)
             resource.append(self.subfile)
-            resource.print("***EOD***")
-            resource.print("def")
-            resource.print()
-            resource.print("/%s " % ps_identifyer)
-            resource.print("<< /FormType 1")
-            resource.print("   /BBox [%f %f %f %f]" % self.as_tuple())
-            resource.print("   /Matrix [ 1 0 0 1 0 0]")
-            resource.print("   /PaintProc")
-            resource.print("   { pop")
-            resource.print("       /ostate save def")
-            resource.print("         /showpage {} def")
-            resource.print("         /setpagedevice /pop load def")
-            resource.print("         %sImageData 0 setfileposition" % (
-                                                          ps_identifyer) )
-            resource.print("            %sImageData cvx exec" % (
-                                                          ps_identifyer) )
-            resource.print("       ostate restore")
-            resource.print("   } bind")
-            resource.print(">> def")
+            resource.write(_eps_resource_tail % values)
 
             # Store the ps code to use the eps file in self
             self.print("%s execform" % ps_identifyer)
@@ -352,6 +429,7 @@ class LineBox(Box):
     @w.setter
     def w(self, w):
         self._w = w
+        self._bounding_path_bytes = None
 
     @property
     def h(self):
@@ -360,6 +438,7 @@ class LineBox(Box):
     @h.setter
     def h(self, h):
         self._h = h
+        self._bounding_path_bytes = None
 
     @property
     def y(self):
@@ -416,11 +495,23 @@ class TextBox(Canvas):
         will advance the cursor downward. No bounds check for the
         bottom is performed.
         """
-        for line in lines:
-            assert isinstance(line, LineBox), TypeError
+        if not lines:
+            # PSBuffer.__init__() calls this before we have a cursor.
+            return
+
+        if __debug__:
+            for line in lines:
+                assert isinstance(line, LineBox), TypeError
 
-            super().write(line)
-            self._cursor -= line.h
+        super().write(*lines)
+
+        # Subtract the heights one by one, like the typesetter does
+        # when it places the lines, so the cursor ends up exactly at
+        # the bottom of the last line.
+        cursor = self._cursor
+        for line in lines:
+            cursor -= line.h
+        self._cursor = cursor
 
     def typeset(self, lines):
         self.write(*lines)
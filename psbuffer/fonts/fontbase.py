@@ -24,7 +24,7 @@
 ##
 ##  I have added a copy of the GPL in the file gpl.txt.
 
-import sys, functools, unicodedata, warnings
+import sys, collections, functools, itertools, unicodedata, warnings
 from typing import Sequence
 
 from ..base import ps_literal, ps_escape
@@ -42,6 +42,9 @@ class Font(object):
     """
     Abstract base class for fonts.
     """
+    __slots__ = ( "ps_name", "full_name", "family_name", "weight", "italic",
+                  "fixed_width", "metrics", )
+
     def __init__(self, ps_name, full_name, family_name,
                  weight, italic, fixed_width, metrics):
         """
@@ -88,6 +91,8 @@ class Font(object):
 
 
 class GlyphMetric:
+    __slots__ = ( "char_code", "ps_name", "width", "bounding_box", )
+
     def __init__(self, char_code, width, ps_name, bounding_box):
         """
         @param char_code: Character code in font encoding
@@ -115,13 +120,29 @@ class FontMetrics(dict):
 
     @ivar kerning_pairs: Dict object mapping tuples of integer (unicode
       codes) to floats (kerning value for that pair).
+    @ivar widths: Dict object mapping unicode codepoints to the width
+      of their glyph, kept in sync with the GlyphMetric objects so
+      charwidth() does not have to look at those.
     """
     def __init__(self):
         self.kerning_pairs = {}
         self.kerning_pairs.setdefault(0.0)
+        self.widths = {}
+
+    def __setitem__(self, codepoint, glyph_metric):
+        dict.__setitem__(self, codepoint, glyph_metric)
+        self.widths[codepoint] = glyph_metric.width
+
+    def __delitem__(self, codepoint):
+        dict.__delitem__(self, codepoint)
+        del self.widths[codepoint]
 
     def charwidth(self, codepoint, font_size):
-        return self.get(codepoint, self[32]).width * font_size
+        widths = self.widths
+        if codepoint in widths:
+            return widths[codepoint] * font_size
+        else:
+            return widths[32] * font_size
 
 
 class SetupLinesForFont(object):
@@ -265,6 +286,13 @@ class FontEncoding(object):
         return f"{self.font.ps_name}*"
 
 
+# The representation of each 8-bit code in a PostScript string literal as
+# used by FontInstance.postscript_representation() below.
+_pscode_literals = [ b"\\%03o" % byte
+                     if byte < 32 or byte > 240 or byte in (40, 41, 92,)
+                     else bytes((byte,))
+                     for byte in range(256) ]
+
 class FontInstance(object):
     """
     A FontSpec knows about glyph sizes for a specific font size
@@ -272,6 +300,9 @@ class FontInstance(object):
     scalefont, and setfont) and represent strings in PostScript commands
     (show and xshow)
     """
+    # Upper bound for the number of entries in strings_widths.
+    strings_widths_max = 4096
+
     def __init__(self, font:Font, size:float,
                  char_spacing:float, line_height:float,
                  use_kerning:bool):
@@ -287,6 +318,10 @@ class FontInstance(object):
         # Maps unicode code point to width:float in regular PostScrpipt units.
         self.widths = {}
 
+        # Maps tuples of code points to the result of charswidth(),
+        # the least recently used first. See strings_widths_max.
+        self.strings_widths = collections.OrderedDict()
+
         # We add char widths for the unicode space characters
         # define in the encoding tables. If the font defines them,
         # fine. If not, we use the suggested factor with regard to
@@ -323,18 +358,29 @@ class FontInstance(object):
         will be taken into account, if available. The char_spacing
         parameter is in regular PostScript units, too.
         """
-        space_metric = self.charwidth(32)
-        width = sum([self.charwidth(cp) for cp in codepoints])
+        key = tuple(codepoints)
+        strings_widths = self.strings_widths
+        if key in strings_widths:
+            strings_widths.move_to_end(key)
+            return strings_widths[key]
+
+        widths = self.widths
+        charwidth = self.charwidth
+        width = sum([ widths[cp] if cp in widths else charwidth(cp)
+                      for cp in codepoints ])
 
         if self.use_kerning:
-            kerning_pairs = self.metrics.kerning_pairs
-            kerning = sum([ kerning_pairs.get((char, next,), 0.0 )
-                            for char, next in zip(codepoints[:-1],
-                                                  codepoints[1:]) ])
+            kerning = sum(map(self.metrics.kerning_pairs.get,
+                              zip(codepoints, codepoints[1:]),
+                              itertools.repeat(0.0)))
             width += kerning * self.size
 
         if self.char_spacing > 0.0:
-            width += (len(s) - 1) * self.char_spacing
+            width += (len(codepoints) - 1) * self.char_spacing
+
+        strings_widths[key] = width
+        if len(strings_widths) > self.strings_widths_max:
+            strings_widths.popitem(last=False)
 
         return width
 
@@ -347,20 +393,10 @@ class FontInstance(object):
         particular encoding. This function will register all
         characters in us with this document.
         """
-        ret = bytearray()
-
-        for byte in self.encoding(container).pscodes_for(codepoints):
-            if byte is None:
-                ps = [32,] # Space
-            else:
-                if byte < 32 or byte > 240 or byte in (40,41,92,):
-                    ps = b"\%03o" % byte
-                else:
-                    ps = [byte,]
-
-            ret.extend(ps)
-
-        return ret
+        literals = _pscode_literals
+        return bytearray().join([
+            b" " if byte is None else literals[byte] # None becomes a space.
+            for byte in self.encoding(container).pscodes_for(codepoints) ])
 
     def setfont(self, container):
         print = container.print
@@ -374,17 +410,19 @@ class FontInstance(object):
             container, codepoints))
 
     def xshow_params(self, container, codepoints):
+        # As in charswidth(), the kerning values are looked up by map()
+        # and zip(), which reuses its tuple for each pair.
         if self.use_kerning:
-            kerning_pairs = self.metrics.kerning_pairs
+            kernings = map(self.metrics.kerning_pairs.get,
+                           zip(codepoints, codepoints[1:] + [0,]),
+                           itertools.repeat(0.0))
         else:
-            kerning_pairs = {}
-
-        displacements = []
-        for codepoint, next in zip(codepoints, codepoints[1:] + [0,]):
-            kerning = kerning_pairs.get( (codepoint, next,), 0.0 )
-            displacements.append(self.charwidth(codepoint)
-                                 + kerning
-                                 + self.char_spacing)
+            kernings = itertools.repeat(0.0)
+
+        charwidth = self.charwidth
+        char_spacing = self.char_spacing
+        displacements = [ charwidth(codepoint) + kerning + char_spacing
+                          for codepoint, kerning in zip(codepoints, kernings) ]
 
         return ( self.postscript_representation(container, codepoints),
                  displacements, )
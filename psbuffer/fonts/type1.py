@@ -46,6 +46,8 @@ class Type1(Font):
     The outline file (in pfa/b format) will be converted to pfa and
     included in the output file entirely.
     """
+    __slots__ = ( "outline_file", )
+
     def __init__(self, outline_file, metrics_file):
         """
         @param outline_file: File pointer of a .pfa/b file.
@@ -86,6 +88,8 @@ class ResidentType1(Font):
     but the metrics file must be in AFM format. Fontforge knows how to
     create these and does so when writing Type 1 font files.
     """
+    __slots__ = ()
+
     def __init__(self, metrics_file, ps_name=None):
         """
         `metrics_file`: File pointer of a .afm file
@@ -24,7 +24,7 @@
 ##
 ##  I have added a copy of the GPL in the file gpl.txt.
 
-import os, os.path as op, re, struct, typing, pathlib, argparse
+import os, os.path as op, re, struct, binascii, typing, pathlib, argparse
 from collections.abc import Sequence
 
 from .measure import Rectangle
@@ -179,44 +179,30 @@ def pfb2pfa(pfb:typing.BinaryIO, pfa:typing.BinaryIO):
     reading and writing, respectively.
     """
 
-    def readone():
-        bs = pfb.read(1)
-        if bs == b"":
-            return None
-        else:
-            return bs[0]
-
     while True:
-        r = readone()
-        if r != 128:
-            raise PFBError("Not a pfb file! (%s)" % repr(r + pfb.read(50)))
+        header = pfb.read(2)
+        if len(header) < 2 or header[0] != 128:
+            raise PFBError("Not a pfb file! (%s)" % repr(header + pfb.read(50)))
 
-        t = readone()
+        t = header[1]
 
         if t == 1 or t == 2:
-            l1 = readone()
-            l2 = readone()
-            l3 = readone()
-            l4 = readone()
-
-            l = l1 | l2 << 8 | l3 << 16 | l4 << 24
+            l, = struct.unpack("<I", pfb.read(4))
+            segment = pfb.read(l)
 
         if t == 1:
-            for i in range(l):
-                c = readone()
-                if c == "\r":
-                    pfa.write(b"\n")
-                else:
-                    pfa.write(bytes([c]))
+            pfa.write(segment.replace(b"\r", b"\n"))
 
         elif t == 2:
-            for i in range(l):
-                c = readone()
-                pfa.write(b"%02x" % c)
-                if (i + 1) % 30 == 0:
-                    pfa.write(b"\n")
-
-            pfa.write(b"\n")
+            # 30 bytes, that is 60 hex digits, to a line and a newline
+            # at the end of the segment.
+            hexdigits = binascii.hexlify(segment)
+            for i in range(0, len(hexdigits), 60):
+                pfa.write(hexdigits[i:i+60])
+                pfa.write(b"\n")
+
+            if len(hexdigits) % 60 == 0:
+                pfa.write(b"\n")
         elif t == 3:
             break
         else:
@@ -0,0 +1,27 @@
+import io, unittest
+
+from psbuffer.boxes import Canvas
+
+class ClipTest(unittest.TestCase):
+    def test_clip_inside_gsave(self):
+        canvas = Canvas(10, 20, 30, 40, clip=True, comment="clipped")
+        canvas.print("0 0 moveto")
+
+        fp = io.BytesIO()
+        canvas.write_to(fp)
+        lines = fp.getvalue().split(b"\n")
+
+        begin = lines.index(b"gsave % begin Canvas: clipped")
+        clip = lines.index(b"clip % clip=True")
+        end = lines.index(b"grestore % end Canvas: clipped")
+
+        self.assertTrue(begin < clip < end)
+        self.assertEqual(lines[clip-5:clip],
+                         [ b"10.000 20.000 moveto",
+                           b"10.000 60.000 lineto",
+                           b"40.000 60.000 lineto",
+                           b"40.000 20.000 lineto",
+                           b"closepath", ])
+
+if __name__ == "__main__":
+    unittest.main()